@@ -0,0 +1,75 @@
+import sys
+from datetime import datetime
+from filecmp import cmpfiles
+from os import makedirs, walk
+from os.path import join, relpath
+from shutil import copytree
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from bench.generate import generate_library
+from tool import find_files, xml_backend
+from tool.match import CastMatcher
+from tool.plex import Episode, XmlSerializer
+from tool.stats import stats
+from tool.store import JsonCastStore
+from tool.transform import create_pipeline
+
+_backends = [("stdlib", False), ("lxml", True)]
+
+
+def _thumb(directory: str, cast_path: str) -> float:
+    pipeline = create_pipeline(["thumb"], CastMatcher(JsonCastStore(cast_path)))
+    start = perf_counter()
+    for file in find_files(directory, "*.xml"):
+        pipeline.process(file)
+    return perf_counter() - start
+
+
+def _serialize(directory: str, count: int) -> float:
+    episodes = [Episode(name="Show", season=1, episode=i, title=f"Episode {i}", aired=datetime(2020, 1, 1),
+                        plot="Plot", directors=["Director"], writers=["Writer A", "Writer B"], rating=8.5)
+                for i in range(1, count + 1)]
+    makedirs(directory)
+    start = perf_counter()
+    XmlSerializer().serialize_many(episodes, directory)
+    return perf_counter() - start
+
+
+def _same_files(a: str, b: str) -> bool:
+    names = [relpath(join(root, name), a) for root, _, files in walk(a) for name in files]
+    _, mismatch, errors = cmpfiles(a, b, names, shallow=False)
+    return not mismatch and not errors
+
+
+def main(files: int = 10000, actors: int = 20):
+    xml_backend.use_lxml(True)
+    if xml_backend.name != "lxml":
+        print("lxml is not installed")
+        sys.exit(1)
+    stats.enabled = True
+    with TemporaryDirectory() as directory:
+        base = join(directory, "base")
+        cast_path = generate_library(base, files=files, actors=actors, cast_size=files)
+        for case in ["thumb", "serialize"]:
+            outputs = []
+            for name, use_lxml in _backends:
+                xml_backend.use_lxml(use_lxml)
+                output = join(directory, f"{case}-{name}")
+                if case == "thumb":
+                    copytree(base, output)
+                    elapsed = _thumb(output, cast_path)
+                else:
+                    elapsed = _serialize(output, files)
+                outputs.append(output)
+                print(f"{case} {name}: {elapsed:.3f}s ({files / elapsed:.0f} files/s)")
+                stats.report(sys.stdout)
+                stats.clear()
+            if not _same_files(*outputs):
+                print(f"{case}: output differs")
+                sys.exit(1)
+    xml_backend.use_lxml(False)
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
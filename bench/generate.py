@@ -0,0 +1,50 @@
+import json
+import random
+import sys
+from os import makedirs
+from os.path import join
+from typing import List
+
+_roots = ["tvshow", "movie", "episodedetails"]
+
+
+def actor_names(count: int) -> List[str]:
+    return [f"Actor {i:06d}" for i in range(count)]
+
+
+def generate_library(directory: str, files: int = 1000, actors: int = 10, cast_size: int = 5000,
+                     defined: float = 0.8, folders: int = 50, seed: int = 0) -> str:
+    """Write tvshow/movie/episodedetails xml files and a cast.json into directory, return the cast.json path."""
+    rand = random.Random(seed)
+    names = actor_names(cast_size)
+    cast_count = int(cast_size * defined)
+    casts = {name: f"https://example.com/{name}.png" for name in names[:cast_count]}
+    for i in range(files):
+        folder = join(directory, f"Show {i % folders:04d}")
+        makedirs(folder, exist_ok=True)
+        root = _roots[i % len(_roots)]
+        lines = [f"<{root}>", f"    <title>Title {i} ＆ ｆｕｌｌ ｗｉｄｔｈ</title>", "    <plot>Plot... ・・・</plot>"]
+        for name in rand.sample(names, min(actors, len(names))):
+            lines += ["    <actor>", f"        <name>{name}</name>", "        <role>Role</role>", "    </actor>"]
+        lines.append(f"</{root}>")
+        with open(join(folder, f"{root} {i:06d}.xml"), mode="w", encoding="utf-8") as file:
+            file.write("\n".join(lines) + "\n")
+    cast_path = join(directory, "cast.json")
+    with open(cast_path, mode="w", encoding="utf-8") as file:
+        json.dump(casts, file, ensure_ascii=False)
+    return cast_path
+
+
+def generate_images(directory: str, count: int = 5000, versions: int = 3, seed: int = 0):
+    """Write empty actor images named like "name.version.ext" for cast."""
+    rand = random.Random(seed)
+    makedirs(directory, exist_ok=True)
+    exts = [".png", ".jpg", ".jpeg", ".gif"]
+    for name in actor_names(count):
+        for version in range(rand.randint(1, versions)):
+            suffix = f".{version}" if version > 0 else ""
+            open(join(directory, f"{name}{suffix}{rand.choice(exts)}"), mode="wb").close()
+
+
+if __name__ == "__main__":
+    generate_library(sys.argv[1], *[int(arg) for arg in sys.argv[2:]])
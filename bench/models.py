@@ -0,0 +1,45 @@
+import sys
+import tracemalloc
+from time import perf_counter
+
+from tool.plex import Episode
+
+
+# Dict-backed Episode as it was before __slots__, without the (broken) rating check.
+class _LegacyEpisode:
+    def __init__(self, name, season, episode, title=None, aired=None, mpaa=None, plot=None, directors=None,
+                 writers=None, producers=None, guests=None, rating=None):
+        self.name = name
+        self.season = season
+        self.episode = episode
+        self.title = title
+        self.aired = aired
+        self.mpaa = mpaa
+        self.plot = plot
+        self.directors = directors if directors is not None else []
+        self.writers = writers if writers is not None else []
+        self.producers = producers if producers is not None else []
+        self.guests = guests if guests is not None else []
+        self.rating = rating
+
+
+def measure(cls, count: int):
+    tracemalloc.start()
+    start = perf_counter()
+    episodes = [cls("Show", 1, i + 1, title="Title", rating=5.0) for i in range(count)]
+    elapsed = perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del episodes
+    return size, elapsed
+
+
+def main(count: int = 1000000):
+    for name, cls in [("legacy", _LegacyEpisode), ("slots", Episode)]:
+        size, elapsed = measure(cls, count)
+        print(f"{name}: {size / 1024 / 1024:.1f} MiB for {count} episodes ({size / count:.0f} B each), "
+              f"{elapsed:.2f} s")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,59 @@
+import re
+import sys
+from timeit import timeit
+from unicodedata import normalize
+
+from tool import replace_words
+from tool.normalize import normal, _before, _after
+
+
+def legacy_normal(source: str) -> str:
+    content = replace_words(source, _before)
+    content = normalize("NFKC", content)
+    return replace_words(content, _after)
+
+
+def _compile(replacement):
+    pattern = re.compile("|".join(re.escape(word) for word in sorted(replacement.keys(), key=len, reverse=True)))
+    return lambda source: pattern.sub(lambda match: replacement[match.group()], source)
+
+
+_before_regex = _compile(_before)
+_after_regex = _compile(_after)
+
+
+# Single-pass regex alternation per phase, kept to show why normal() stays on str.replace.
+def regex_normal(source: str) -> str:
+    return _after_regex(normalize("NFKC", _before_regex(source)))
+
+
+def document(size_mb: float, kind: str) -> str:
+    if kind == "tvshow":
+        block = "<tvshow>\n    <title>ｶﾀｶﾅ ＡＢＣ ～ show</title>\n" \
+                "    <plot>Ｆｕｌｌ ｗｉｄｔｈ plot... ・・・ 日本語のテキスト ＆ more</plot>\n" + \
+                "".join(f"    <actor>\n        <name>名前 {i}</name>\n        <role>Role</role>\n"
+                        f"        <thumb>https://example.com/{i}.png</thumb>\n    </actor>\n" for i in range(20)) + \
+                "</tvshow>\n"
+    elif kind == "mixed":
+        block = "    <plot>Ｆｕｌｌ ｗｉｄｔｈ ～ ｶﾀｶﾅ ＆ more... ．．． ・・・ &amp; plain text</plot>\n"
+    else:
+        block = "    <plot>Plain ASCII plot text with nothing to normalize at all, just words.</plot>\n"
+    return block * int(size_mb * 1024 * 1024 / len(block.encode("utf-8")))
+
+
+def main(size_mb: float = 4, number: int = 5):
+    for kind in ["tvshow", "mixed", "ascii"]:
+        source = document(size_mb, kind)
+        expected = legacy_normal(source)
+        if normal(source) != expected or regex_normal(source) != expected:
+            print(f"{kind}: output differs")
+            sys.exit(1)
+        results = []
+        for name, func in [("legacy", legacy_normal), ("regex", regex_normal), ("normal", normal)]:
+            elapsed = timeit(lambda: func(source), number=number) / number
+            results.append(f"{name} {size_mb / elapsed:.1f} MB/s")
+        print(f"{kind} {size_mb} MB: {', '.join(results)}")
+
+
+if __name__ == "__main__":
+    main(*[float(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,119 @@
+import sys
+from datetime import datetime
+from io import BytesIO
+from timeit import timeit
+# noinspection PyProtectedMember
+from xml.etree import ElementTree as etree
+# noinspection PyProtectedMember
+from xml.etree.ElementTree import Element, SubElement, Comment, ProcessingInstruction, _escape_cdata, \
+    _escape_attrib, QName
+
+from tool import PrettyXmlWriter
+from tool.plex import Episode, XmlSerializer
+
+
+# The global _serialize_xml hack that PrettyXmlWriter replaced, with getchildren() swapped for len() so it still runs.
+def _legacy_serialize_xml(write, elem, qnames, namespaces, short_empty_elements, addintend="    ", intend="",
+                          newl="\n", **kwargs):
+    tag = elem.tag
+    text = elem.text
+    if tag is Comment:
+        write(intend + "<!--%s-->" % text)
+    elif tag is ProcessingInstruction:
+        write(intend + "<?%s?>" % text)
+    else:
+        tag = qnames[tag]
+        if tag is None:
+            if text:
+                write(_escape_cdata(text))
+            for e in elem:
+                _legacy_serialize_xml(write, e, qnames, None, addintend=addintend, intend=addintend + intend,
+                                      newl=newl, short_empty_elements=short_empty_elements)
+        else:
+            write(intend + "<" + tag)
+            items = list(elem.items())
+            if items or namespaces:
+                if namespaces:
+                    for v, k in sorted(namespaces.items(), key=lambda x: x[1]):
+                        if k:
+                            k = ":" + k
+                        write(" xmlns%s=\"%s\"" % (k, _escape_attrib(v)))
+                for k, v in sorted(items):
+                    if isinstance(k, QName):
+                        k = k.text
+                    if isinstance(v, QName):
+                        v = qnames[v.text]
+                    else:
+                        v = _escape_attrib(v)
+                    write(" %s=\"%s\"" % (qnames[k], v))
+            if text or len(elem) or not short_empty_elements:
+                write(">")
+                if text is not None:
+                    write(_escape_cdata(text))
+                else:
+                    if len(elem) > 0:
+                        write(newl)
+                for e in elem:
+                    _legacy_serialize_xml(write, e, qnames, None, addintend=addintend, intend=addintend + intend,
+                                          newl=newl, short_empty_elements=short_empty_elements)
+                if len(elem) > 0:
+                    write(intend)
+                write("</" + tag + ">" + newl)
+            else:
+                write(" />" + newl)
+    if elem.tail:
+        write(_escape_cdata(elem.tail))
+
+
+def episode_fixture() -> Element:
+    episode = Episode(name="Show", season=1, episode=2, title="Pilot <Part 1> & \"more\"",
+                      aired=datetime(2018, 1, 3), mpaa="TV-14", plot="",
+                      directors=["Alice"], writers=["Bob", "Carol"], producers=["Dave"], guests=["Eve"], rating=8.5)
+    # noinspection PyProtectedMember
+    return XmlSerializer()._serialize_episode(episode)
+
+
+def tvshow_fixture(actors: int = 50) -> Element:
+    root = Element("tvshow")
+    SubElement(root, "title").text = "Show ＆ Friends"
+    SubElement(root, "plot").text = "Line 1\nLine 2 > 1"
+    SubElement(root, "genre")
+    root.append(Comment(" generated "))
+    for i in range(actors):
+        actor = SubElement(root, "actor")
+        SubElement(actor, "name").text = f"Actor {i}"
+        SubElement(actor, "role").text = f"Role {i}"
+        SubElement(actor, "thumb", {"z": "1", "aspect": "poster"}).text = f"https://example.com/{i}.png"
+    return root
+
+
+def legacy_write(root: Element, short_empty_elements: bool = False) -> bytes:
+    original = etree._serialize_xml
+    etree._serialize_xml = etree._serialize["xml"] = _legacy_serialize_xml
+    try:
+        buffer = BytesIO()
+        etree.ElementTree(root).write(buffer, encoding="utf-8", short_empty_elements=short_empty_elements)
+        return buffer.getvalue()
+    finally:
+        etree._serialize_xml = etree._serialize["xml"] = original
+
+
+def pretty_write(writer: PrettyXmlWriter, root: Element, short_empty_elements: bool = False) -> bytes:
+    return writer.tostring(root, short_empty_elements).encode("utf-8", "xmlcharrefreplace")
+
+
+def main(number: int = 2000):
+    writer = PrettyXmlWriter()
+    for name, root in [("episode", episode_fixture()), ("tvshow", tvshow_fixture())]:
+        for short_empty_elements in (False, True):
+            if legacy_write(root, short_empty_elements) != pretty_write(writer, root, short_empty_elements):
+                print(f"{name}: output differs (short_empty_elements={short_empty_elements})")
+                sys.exit(1)
+        legacy = timeit(lambda: legacy_write(root), number=number)
+        pretty = timeit(lambda: pretty_write(writer, root), number=number)
+        print(f"{name}: legacy {legacy * 1000 / number:.3f} ms, pretty {pretty * 1000 / number:.3f} ms, "
+              f"speedup x{legacy / pretty:.2f} (identical output)")
+
+
+if __name__ == "__main__":
+    main()
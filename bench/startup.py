@@ -0,0 +1,60 @@
+import subprocess
+import sys
+from os.path import dirname, abspath
+from time import perf_counter
+from typing import List, Tuple
+
+_root = dirname(dirname(abspath(__file__)))
+_modules = ["tool.create", "tool.thumb", "tool.cast", "tool.normalize", "tool.youtube", "tool.watch"]
+
+_cases = [
+    ("tool.py thumb --help", ["tool.py", "thumb", "--help"]),
+    ("tool.py youtube --help", ["tool.py", "youtube", "--help"]),
+    # What every invocation used to import before commands were loaded lazily.
+    ("eager imports", ["-c", "import tool.commands, " + ", ".join(_modules)]),
+]
+
+
+def import_times(argv: List[str]) -> Tuple[int, List[Tuple[int, str]]]:
+    result = subprocess.run([sys.executable, "-X", "importtime", *argv], cwd=_root, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    total = 0
+    modules = []  # type: List[Tuple[int, str]]
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        # Nested imports are indented, only top level ones add up to the total.
+        if not name.startswith("  "):
+            total += int(cumulative)
+            modules.append((int(cumulative), name.strip()))
+    modules.sort(reverse=True)
+    return total, modules
+
+
+def wall_time(argv: List[str], number: int) -> float:
+    times = []
+    for _ in range(number):
+        start = perf_counter()
+        subprocess.run([sys.executable, *argv], cwd=_root, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(perf_counter() - start)
+    return min(times)
+
+
+def main(number: int = 10, top: int = 5):
+    for name, argv in _cases:
+        try:
+            total, modules = import_times(argv)
+        except RuntimeError as e:
+            print(f"{name}: failed ({e})")
+            continue
+        print(f"{name}: {wall_time(argv, number) * 1000:.1f} ms wall, {total / 1000:.1f} ms importing")
+        for cumulative, module in modules[:top]:
+            print(f"    {cumulative / 1000:>8.1f} ms  {module}")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,142 @@
+import json
+import platform
+import sys
+import tracemalloc
+from argparse import ArgumentParser
+from contextlib import redirect_stdout, contextmanager
+from datetime import datetime
+from os import chdir, getcwd, devnull, makedirs
+from os.path import join
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Callable, Dict, List, Tuple
+
+from bench.generate import generate_library, generate_images
+from bench.normalize import document
+from tool.commands import commands
+from tool.normalize import normal
+from tool.plex import Episode, XmlSerializer
+
+
+def _parse(name: str, argv: List[str]):
+    command = next(command for command in commands if command.name == name)
+    parser = ArgumentParser()
+    command.add_parser(parser.add_subparsers(dest="command"))
+    return command.load(), parser.parse_args([name] + argv)
+
+
+@contextmanager
+def _quiet(directory: str):
+    cwd = getcwd()
+    chdir(directory)
+    try:
+        with open(devnull, mode="w") as out, redirect_stdout(out):
+            yield
+    finally:
+        chdir(cwd)
+
+
+def _thumb_case(scale: Dict[str, int]) -> Callable[[str], Callable[[], None]]:
+    def setup(directory: str):
+        generate_library(directory, files=scale["files"], actors=scale["actors"], cast_size=scale["cast"])
+        func, args = _parse("thumb", ["-d", "-1", "-x", ""])
+        return lambda: func(args)
+
+    return setup
+
+
+def _cast_case(scale: Dict[str, int]) -> Callable[[str], Callable[[], None]]:
+    def setup(directory: str):
+        generate_images(join(directory, "images"), count=scale["cast"])
+        func, args = _parse("cast", ["-i", "images", "-o", "cast.json", "-p", "https://example.com/"])
+        return lambda: func(args)
+
+    return setup
+
+
+def _create_case(scale: Dict[str, int]) -> Callable[[str], Callable[[], None]]:
+    def setup(directory: str):
+        makedirs(join(directory, "out"))
+        func, args = _parse("create", ["Show", "-o", "out", "-E", str(scale["episodes"]), "-D", "2020-01-01",
+                                     "-d", "Director", "-w", "Writer A", "Writer B", "-r", "8.5"])
+        return lambda: func(args)
+
+    return setup
+
+
+def _normal_case(scale: Dict[str, int]) -> Callable[[str], Callable[[], None]]:
+    def setup(_directory: str):
+        source = document(scale["normalize_mb"], "tvshow")
+        return lambda: normal(source)
+
+    return setup
+
+
+def _serialize_case(scale: Dict[str, int]) -> Callable[[str], Callable[[], None]]:
+    def setup(directory: str):
+        serializer = XmlSerializer()
+        episodes = [Episode(name="Show", season=1, episode=i, title=f"Episode {i}", aired=datetime(2020, 1, 1),
+                            plot="Plot", directors=["Director"], writers=["Writer A", "Writer B"], rating=8.5)
+                    for i in range(1, scale["episodes"] + 1)]
+        return lambda: [serializer.serialize(episode, folder=directory) for episode in episodes]
+
+    return setup
+
+
+_cases = [("thumb", _thumb_case), ("cast", _cast_case), ("create", _create_case),
+          ("normal", _normal_case), ("serialize", _serialize_case)]
+
+_scales = {
+    "small": {"files": 500, "actors": 10, "cast": 2000, "episodes": 500, "normalize_mb": 1},
+    "medium": {"files": 5000, "actors": 20, "cast": 20000, "episodes": 5000, "normalize_mb": 8},
+    "large": {"files": 20000, "actors": 30, "cast": 50000, "episodes": 20000, "normalize_mb": 32},
+}
+
+
+def _measure(setup: Callable[[str], Callable[[], None]], repeat: int) -> Tuple[List[float], int]:
+    times = []
+    for _ in range(repeat):
+        with TemporaryDirectory() as directory, _quiet(directory):
+            run = setup(directory)
+            start = perf_counter()
+            run()
+            times.append(perf_counter() - start)
+    # Measured on a separate run, tracemalloc slows allocation heavy code down.
+    with TemporaryDirectory() as directory, _quiet(directory):
+        run = setup(directory)
+        tracemalloc.start()
+        try:
+            run()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return times, peak
+
+
+def main(argv: List[str]):
+    parser = ArgumentParser(prog="python -m bench.suite")
+    parser.add_argument("-s", "--scale", choices=_scales.keys(), default="small")
+    parser.add_argument("-n", "--repeat", type=int, default=3)
+    parser.add_argument("-o", "--output", default=None, help="Write results to a JSON file")
+    parser.add_argument("cases", nargs="*", metavar="case", help=f"Cases to run: {', '.join(name for name, _ in _cases)}")
+    args = parser.parse_args(argv)
+    unknown = set(args.cases) - {name for name, _ in _cases}
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(sorted(unknown))}")
+    scale = _scales[args.scale]
+    results = {}
+    for name, case in _cases:
+        if args.cases and name not in args.cases:
+            continue
+        times, peak = _measure(case(scale), args.repeat)
+        results[name] = {"min": min(times), "mean": sum(times) / len(times), "times": times, "peak_memory": peak}
+        print(f"{name}: min {min(times):.3f}s, mean {results[name]['mean']:.3f}s, peak {peak / 1024 / 1024:.1f} MiB")
+    if args.output:
+        with open(args.output, mode="w", encoding="utf-8") as file:
+            json.dump({"date": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+                       "platform": platform.platform(), "scale": args.scale, "parameters": scale,
+                       "repeat": args.repeat, "results": results}, file, indent=4)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,43 @@
+from xml.etree.ElementTree import parse
+
+import pytest
+
+from tool.manifest import ManifestReader
+from tool.plex import XmlSerializer
+
+_manifests = {
+    "manifest.jsonl": "\n".join([
+        '{"episode": 1, "title": "Pilot", "aired": "2020-01-01", "directors": ["Alice"]}',
+        '{"episode": 5, "aired": 20200101}',
+        '{"episode": 6, "aired": "2020-13-01"}',
+        'not json',
+        '["episode", 7]',
+        '',
+        '{"title": "No number"}',
+        '{"episode": 2, "title": "Second", "writers": "Bob|Carol"}',
+    ]) + "\n",
+    "manifest.csv": "\n".join([
+        "episode,title,aired,directors",
+        "1,Pilot,2020-01-01,Alice",
+        "5,,20200101,",
+        "x,Not a number,,",
+        ",No number,,",
+        "2,Second,,Bob|Carol",
+    ]) + "\n",
+}
+
+
+@pytest.mark.parametrize("file_name", sorted(_manifests))
+def test_malformed_rows_are_counted_and_skipped(tmp_path, capsys, file_name):
+    path = tmp_path / file_name
+    path.write_text(_manifests[file_name], encoding="utf-8")
+    reader = ManifestReader(str(path), {"name": "Show", "season": 1, "plot": ""})
+
+    count = XmlSerializer().serialize_many(reader, str(tmp_path))
+
+    assert count == 2
+    assert reader.errors == (5 if file_name.endswith(".jsonl") else 3)
+    assert f"{path}:3: " in capsys.readouterr().out
+    assert sorted(file.name for file in tmp_path.glob("*.xml")) == ["Show - s01e01.xml", "Show - s01e02.xml"]
+    assert parse(tmp_path / "Show - s01e01.xml").findtext("aired") == "2020-01-01"
+    assert parse(tmp_path / "Show - s01e02.xml").findtext("title") == "Second"
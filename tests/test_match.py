@@ -0,0 +1,42 @@
+import pytest
+
+from tool.match import CastMatcher
+
+_casts = {
+    "Tom ＆ Jerry": "tom.png",
+    "Ｊｏｈｎ Ｄｏｅ": "john.png",
+    "Mary  Ann": "mary.png",
+    "Alex Kim": "alex1.png",
+    "ALEX KIM": "alex2.png",
+}
+
+
+@pytest.mark.parametrize("name, thumb", [
+    ("Tom ＆ Jerry", "tom.png"),
+    ("Tom & Jerry", "tom.png"),
+    ("tom &  JERRY", "tom.png"),
+    ("John Doe", "john.png"),
+    ("ｊｏｈｎ　ｄｏｅ", "john.png"),
+    (" mary ann ", "mary.png"),
+    ("Nobody", None),
+])
+def test_normalized_match(name, thumb):
+    assert CastMatcher(_casts, normalize=True).match(name) == (thumb, False)
+
+
+def test_exact_match_only_without_normalize():
+    matcher = CastMatcher(_casts)
+    assert matcher.match("Tom ＆ Jerry") == ("tom.png", False)
+    assert matcher.match("Tom & Jerry") == (None, False)
+
+
+def test_ambiguous_match():
+    matcher = CastMatcher(_casts, normalize=True)
+    assert matcher.match("alex kim") == (None, True)
+    assert matcher.match("Alex Kim") == ("alex1.png", False)
+
+
+def test_fuzzy_match():
+    matcher = CastMatcher(_casts, distance=1)
+    assert matcher.match("Tom & Jery") == ("tom.png", False)
+    assert matcher.match("Alex Kin") == (None, True)
@@ -0,0 +1,32 @@
+from xml.etree.ElementTree import parse
+
+from tool.normalize import normal_file
+from tool.transform import create_pipeline
+
+_content = """<?xml version="1.0" encoding="utf-8" standalone="yes"?>
+<episodedetails>
+    <title>Tom &amp; Jerry ＆ Ｆｒｉｅｎｄｓ</title>
+    <plot>ｶﾀｶﾅ～ ①... and．．．and・・・</plot>
+    <tag name="Ａ&amp;Ｂ">＜ok＞ &lt;b&gt;</tag>
+    <actor>
+        <name>Ｊｏｈｎ　Ｄｏｅ</name>
+    </actor>
+</episodedetails>
+"""
+
+
+def _elements(path):
+    return [(element.tag, (element.text or "").strip(), element.attrib) for element in parse(path).iter()]
+
+
+def test_stage_matches_normal_file(tmp_path):
+    text_path = tmp_path / "text.nfo"
+    tree_path = tmp_path / "tree.nfo"
+    text_path.write_text(_content, encoding="utf-8")
+    tree_path.write_text(_content, encoding="utf-8")
+
+    assert normal_file(str(text_path))
+    assert create_pipeline(["normalize"]).process(str(tree_path)).modified
+
+    assert _elements(tree_path) == _elements(text_path)
+    assert _elements(tree_path)[1] == ("title", "Tom ＆ Jerry ＆ Friends", {})
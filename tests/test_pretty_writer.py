@@ -0,0 +1,30 @@
+import pytest
+
+from bench.serialize import episode_fixture, tvshow_fixture, legacy_write, pretty_write
+from tool import PrettyXmlWriter
+
+_fixtures = [episode_fixture, tvshow_fixture]
+
+
+@pytest.mark.parametrize("short_empty_elements", [False, True])
+@pytest.mark.parametrize("fixture", _fixtures, ids=lambda fixture: fixture.__name__)
+def test_matches_legacy_serializer(fixture, short_empty_elements):
+    root = fixture()
+    assert pretty_write(PrettyXmlWriter(), root, short_empty_elements) == legacy_write(root, short_empty_elements)
+
+
+@pytest.mark.parametrize("short_empty_elements", [False, True])
+@pytest.mark.parametrize("fixture", _fixtures, ids=lambda fixture: fixture.__name__)
+def test_write_matches_legacy_serializer(tmp_path, fixture, short_empty_elements):
+    root = fixture()
+    path = tmp_path / "out.nfo"
+    PrettyXmlWriter().write(root, str(path), short_empty_elements=short_empty_elements)
+    assert path.read_bytes() == legacy_write(root, short_empty_elements)
+
+
+def test_writer_is_reusable():
+    writer = PrettyXmlWriter()
+    episode = episode_fixture()
+    first = pretty_write(writer, episode)
+    pretty_write(writer, tvshow_fixture())
+    assert pretty_write(writer, episode) == first
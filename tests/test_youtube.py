@@ -0,0 +1,80 @@
+import json
+from functools import partial
+from types import SimpleNamespace
+
+import pytest
+
+youtube = pytest.importorskip("tool.youtube")
+
+
+class _FakeDownloader:
+    entries = []
+    failing = set()
+    downloaded = []
+
+    def __init__(self, opts):
+        self._opts = opts
+        self._post_processors = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def add_post_processor(self, post_processor):
+        post_processor.set_downloader(self)
+        self._post_processors.append(post_processor)
+
+    def extract_info(self, url, download=True, ie_key=None, extra_info=None):
+        if not download:
+            assert self._opts["extract_flat"] == "in_playlist"
+            return {"_type": "playlist",
+                    "entries": [{"_type": "url", "url": vid, "id": vid, "ie_key": "Youtube"} for vid in self.entries]}
+        if url in self.failing:
+            raise RuntimeError(f"{url}: unavailable")
+        info = {"id": url, "title": f"Title {url}", "upload_date": "20200102", "description": f"About {url}",
+                **(extra_info or {})}
+        for ext in (".mp4", ".jpg", ".info.json"):
+            with open(url + ext, mode="w") as file:
+                file.write(url)
+        for hook in self._opts["progress_hooks"]:
+            hook({"status": "finished", "filename": url + ".mp4"})
+        self.downloaded.append(url)
+        for post_processor in self._post_processors:
+            post_processor.run(info)
+        return info
+
+
+def _run(output: str, entries, failing=()):
+    _FakeDownloader.entries = entries
+    _FakeDownloader.failing = set(failing)
+    _FakeDownloader.downloaded = []
+    args = SimpleNamespace(yid="PL0", list=True, output=output, concurrency=2, prefix="Show", season=2, mpaa=None)
+    youtube._download_youtube_playlist(args)
+    with open(f"{output}/{youtube._Journal.file_name}", encoding="utf-8") as file:
+        return sorted(_FakeDownloader.downloaded), json.load(file)
+
+
+def test_concurrent_playlist_is_named_and_resumed(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(youtube, "_download_youtube", partial(youtube._download_youtube, downloader=_FakeDownloader))
+    output = str(tmp_path / "output")
+
+    downloaded, journal = _run(output, ["a", "b", "c"], failing=["b"])
+    assert downloaded == ["a", "c"]
+    assert journal == {
+        "a": {"episode": 1, "state": "completed",
+              "files": ["Show - s02e01.xml", "Show - s02e01.mp4", "Show - s02e01.jpg", "Show - s02e01.info.json"]},
+        "c": {"episode": 3, "state": "completed",
+              "files": ["Show - s02e03.xml", "Show - s02e03.mp4", "Show - s02e03.jpg", "Show - s02e03.info.json"]},
+    }
+
+    downloaded, journal = _run(output, ["a", "b", "c", "d"])
+    assert downloaded == ["b", "d"]
+    assert {vid: video["episode"] for vid, video in journal.items()} == {"a": 1, "b": 2, "c": 3, "d": 4}
+    assert all(video["state"] == "completed" for video in journal.values())
+    assert sorted(path.name for path in (tmp_path / "output").iterdir() if path.name.endswith(".mp4")) == \
+        [f"Show - s02e0{episode}.mp4" for episode in range(1, 5)]
+    assert (tmp_path / "output" / "Show - s02e02.mp4").read_text() == "b"
+    assert not list(tmp_path.glob("*.mp4"))
@@ -1,7 +1,10 @@
+import cProfile
 from argparse import ArgumentParser, HelpFormatter
 from functools import partial
 
-from tool import create, thumb, cast, normalize, menu, youtube
+from tool import menu, xml_backend
+from tool.commands import commands
+from tool.stats import stats
 
 
 class _HelpFormatter(HelpFormatter):
@@ -15,28 +18,40 @@ class _HelpFormatter(HelpFormatter):
 
 def _create_parsers():
     parser = ArgumentParser(prog="Avalon Xml Tools", description="Version 1.0.2", formatter_class=_HelpFormatter)
+    parser.add_argument("--stats", action="store_true",
+                        help="Print time spent per phase (scan, parse, transform, serialize, write) and file counters")
+    parser.add_argument("--profile", type=str, default=None, metavar="<profile file>",
+                        help="Run the command under cProfile and write the stats to <profile file>")
+    parser.add_argument("--lxml", action="store_true",
+                        help="Parse and write xml with lxml when it is installed, output is the same")
     subparsers = parser.add_subparsers(dest="command")
-
-    subparsers_factories = [create.create_subparser,
-                            thumb.create_subparser,
-                            cast.create_subparser,
-                            normalize.create_subparser,
-                            youtube.create_subparser]
-    funcs = {}
-    for factory in subparsers_factories:
-        command, func = factory(subparsers)
-        funcs[command] = func
-    return parser, funcs
+    for command in commands:
+        command.add_parser(subparsers)
+    return parser
 
 
 def main():
-    parser, funcs = _create_parsers()
+    parser = _create_parsers()
     args = parser.parse_args()
+    funcs = {command.name: command.run for command in commands}
     if args.command in funcs:
-        funcs[args.command](args)
+        run = partial(funcs[args.command], args)
     else:
-        items = [menu.MenuItem(key, partial(value, None)) for key, value in funcs.items()]
-        menu.Menu(items).show()
+        items = [menu.MenuItem(key, value) for key, value in funcs.items()]
+        run = menu.Menu(items).show
+    stats.enabled = args.stats
+    xml_backend.use_lxml(args.lxml)
+    profile = cProfile.Profile() if args.profile is not None else None
+    try:
+        if profile is not None:
+            profile.runcall(run)
+        else:
+            run()
+    finally:
+        if profile is not None:
+            profile.dump_stats(args.profile)
+        if args.stats:
+            stats.report()
 
 
 if __name__ == "__main__":
@@ -1,13 +1,17 @@
 import math
 from datetime import datetime
 from fnmatch import fnmatch
-from os import walk, listdir
-from os.path import isdir, join, isfile, getmtime
-from typing import Dict
-from xml import etree
+from os import walk, listdir, replace, remove, getpid
+from os.path import isdir, join, isfile, getmtime, exists
+from shutil import copymode
+from threading import get_ident
+from time import time
+from typing import Dict, BinaryIO, Optional, List, Union
 # noinspection PyProtectedMember
 from xml.etree.ElementTree import Element, Comment, ProcessingInstruction, _escape_cdata, \
-    _escape_attrib, QName
+    _escape_attrib, _namespaces, QName, XMLPullParser, ParseError, ElementTree
+
+from tool.stats import stats
 
 
 def convert_size(size_bytes):
@@ -40,20 +44,30 @@ def valid_file(path_str: str) -> str:
     raise ValueError("{0} is not a file".format(path_str))
 
 
-def find_files(directory, pattern, day_diff=None, recursive=True):
-    now = datetime.now()
+def valid_path(path_str: str) -> str:
+    if isfile(path_str) or isdir(path_str):
+        return path_str
+    raise ValueError("{0} is not a file or directory".format(path_str))
+
+
+def find_files(directory, pattern, day_diff=None, recursive=True, index=None):
+    return stats.iterate("scan", _find_files(directory, pattern, day_diff, recursive, index), "files scanned")
+
+
+def _find_files(directory, pattern, day_diff, recursive, index):
     if isinstance(pattern, str):
         pattern = [pattern]
-    if recursive:
+    # (now - mtime).days <= day_diff  <=>  mtime > now - (day_diff + 1) days
+    cutoff = time() - (day_diff + 1) * 86400 if day_diff is not None else None
+    if recursive and index is not None:
+        yield from index.find(directory, pattern, cutoff)
+    elif recursive:
         for root, dirs, files in walk(directory):
             dirs[:] = [d for d in dirs if not d.startswith(".")
-                       and (
-                               day_diff is None or (
-                               now - datetime.fromtimestamp(getmtime(join(root, d)))).days <= day_diff)]
+                       and (cutoff is None or getmtime(join(root, d)) > cutoff)]
             for base_name in files:
                 filename = join(root, base_name)
-                if any_match(base_name, pattern) \
-                        and (day_diff is None or (now - datetime.fromtimestamp(getmtime(filename))).days <= day_diff):
+                if any_match(base_name, pattern) and (cutoff is None or getmtime(filename) > cutoff):
                     yield filename
     else:
         for file in listdir(directory):
@@ -66,6 +80,39 @@ def any_match(name, patterns):
     return any(fnmatch(name, pattern) for pattern in patterns)
 
 
+def sniff_root_tag(source: BinaryIO, chunk_size: int = 512) -> Optional[str]:
+    # Same incremental parser as iterparse, but fed in small chunks so it stops right after the root start tag.
+    parser = XMLPullParser(events=("start",))
+    try:
+        while True:
+            data = source.read(chunk_size)
+            if not data:
+                return None
+            parser.feed(data)
+            for _, element in parser.read_events():
+                return element.tag
+    except ParseError:
+        return None
+
+
+def temp_name(path: str) -> str:
+    # Unique per thread and process, two writers of one file never share a temp file.
+    return f"{path}.{getpid()}.{get_ident()}.tmp"
+
+
+def write_xml_atomic(tree: ElementTree, path: str, **kwargs):
+    temp_path = temp_name(path)
+    try:
+        xml_backend.write(tree, temp_path, **kwargs)
+        if exists(path):
+            copymode(path, temp_path)
+        replace(temp_path, path)
+    except BaseException:
+        if exists(temp_path):
+            remove(temp_path)
+        raise
+
+
 def replace_words(source: str, replacement: Dict[str, str]) -> str:
     result = source
     for word in replacement.keys():
@@ -77,66 +124,179 @@ def invert_dict(source: dict) -> dict:
     return {v: k for k, v in source.items()}
 
 
-# ============================  Hack Start  ============================
+class PrettyXmlWriter:
+    def __init__(self, indent: str = "    ", newline: str = "\n"):
+        self._indent = indent  # type: str
+        self._newline = newline  # type: str
+        self._indents = [""]  # type: List[str]
 
-def _serialize_xml(write, elem, qnames, namespaces, short_empty_elements, addintend="    ", intend="", newl="\n",
-                   **kwargs):
-    tag = elem.tag
-    text = elem.text
-    if tag is Comment:
-        write(intend + "<!--%s-->" % text)
-    elif tag is ProcessingInstruction:
-        write(intend + "<?%s?>" % text)
-    else:
-        tag = qnames[tag]
-        if tag is None:
-            if text:
-                write(_escape_cdata(text))
-            for e in elem:
-                _serialize_xml(write, e, qnames, None, addintend=addintend, intend=addintend + intend, newl=newl,
-                               short_empty_elements=short_empty_elements)
+    def tostring(self, element: Union[Element, ElementTree], short_empty_elements: bool = True) -> str:
+        if isinstance(element, ElementTree):
+            element = element.getroot()
+        parts = []  # type: List[str]
+        qnames, namespaces = _namespaces(element)
+        self._serialize(parts.append, element, qnames, namespaces, short_empty_elements, 0)
+        return "".join(parts)
+
+    def write(self, element: Union[Element, ElementTree], path: str, encoding: str = "utf-8",
+              xml_declaration: Optional[bool] = None, short_empty_elements: bool = True):
+        with stats.phase("serialize"):
+            content = self.tostring(element, short_empty_elements)
+        if xml_declaration or (xml_declaration is None and encoding.lower() not in ("utf-8", "us-ascii")):
+            content = f"<?xml version='1.0' encoding='{encoding}'?>\n{content}"
+        with stats.phase("write"), open(path, mode="w", encoding=encoding, errors="xmlcharrefreplace") as file:
+            file.write(content)
+        stats.count("files written")
+
+    def _get_indent(self, depth: int) -> str:
+        indents = self._indents
+        while len(indents) <= depth:
+            indents.append(indents[-1] + self._indent)
+        return indents[depth]
+
+    def _serialize(self, write, elem: Element, qnames, namespaces, short_empty_elements: bool, depth: int):
+        tag = elem.tag
+        text = elem.text
+        indent = self._get_indent(depth)
+        if tag is Comment:
+            write(f"{indent}<!--{text}-->")
+        elif tag is ProcessingInstruction:
+            write(f"{indent}<?{text}?>")
         else:
-            write(intend + "<" + tag)
-            items = list(elem.items())
-            if items or namespaces:
-                if namespaces:
-                    for v, k in sorted(namespaces.items(),
-                                       key=lambda x: x[1]):  # sort on prefix
-                        if k:
-                            k = ":" + k
-                        write(" xmlns%s=\"%s\"" % (
-                            k,
-                            _escape_attrib(v)
-                        ))
-                for k, v in sorted(items):  # lexical order
-                    if isinstance(k, QName):
-                        k = k.text
-                    if isinstance(v, QName):
-                        v = qnames[v.text]
-                    else:
-                        v = _escape_attrib(v)
-                    write(" %s=\"%s\"" % (qnames[k], v))
-            if text or len(elem) or not short_empty_elements:
-                write(">")
-                if text is not None:
+            tag = qnames[tag]
+            if tag is None:
+                if text:
                     write(_escape_cdata(text))
-                else:
-                    if len(elem.getchildren()) > 0:
-                        write(newl)
                 for e in elem:
-                    _serialize_xml(write, e, qnames, None, addintend=addintend, intend=addintend + intend, newl=newl,
-                                   short_empty_elements=short_empty_elements)
-                if len(elem.getchildren()) > 0:
-                    write(intend)
-                write("</" + tag + ">" + newl)
+                    self._serialize(write, e, qnames, None, short_empty_elements, depth + 1)
             else:
-                write(" />" + newl)
-    if elem.tail:
-        write(_escape_cdata(elem.tail))
+                write(indent + "<" + tag)
+                if elem.attrib or namespaces:
+                    self._serialize_attributes(write, elem, qnames, namespaces)
+                has_children = len(elem) > 0
+                if text or has_children or not short_empty_elements:
+                    if text is not None:
+                        write(">" + _escape_cdata(text))
+                    elif has_children:
+                        write(">" + self._newline)
+                    else:
+                        write(">")
+                    for e in elem:
+                        self._serialize(write, e, qnames, None, short_empty_elements, depth + 1)
+                    if has_children:
+                        write(indent)
+                    write("</" + tag + ">" + self._newline)
+                else:
+                    write(" />" + self._newline)
+        if elem.tail:
+            write(_escape_cdata(elem.tail))
 
+    @staticmethod
+    def _serialize_attributes(write, elem: Element, qnames, namespaces):
+        if namespaces:
+            for v, k in sorted(namespaces.items(), key=lambda x: x[1]):  # sort on prefix
+                if k:
+                    k = ":" + k
+                write(f" xmlns{k}=\"{_escape_attrib(v)}\"")
+        for k, v in sorted(elem.items()):  # lexical order
+            if isinstance(k, QName):
+                k = k.text
+            if isinstance(v, QName):
+                v = qnames[v.text]
+            else:
+                v = _escape_attrib(v)
+            write(f" {qnames[k]}=\"{v}\"")
+
+
+class XmlBackend:
+    # lxml serializes about twice as fast, but element access from Python is slower, which makes thumb slower
+    # overall (see bench.backend). It is only used when asked for.
+    def __init__(self, use_lxml: bool = False):
+        self._use_lxml = use_lxml  # type: bool
+        self._etree = None
+        self._parser = None
+
+    @property
+    def name(self) -> str:
+        return "lxml" if self._lxml() is not None else "stdlib"
+
+    def use_lxml(self, enabled: bool = True):
+        self._use_lxml = enabled
+
+    def _lxml(self):
+        if not self._use_lxml:
+            return None
+        if self._etree is None:
+            # Imported on first use, commands that never touch xml do not pay for it.
+            try:
+                from lxml import etree
+            except ImportError:
+                self._use_lxml = False
+                return None
+            self._etree = etree
+            # Same tree as the stdlib parser, which drops comments and processing instructions.
+            self._parser = etree.XMLParser(remove_comments=True, remove_pis=True, resolve_entities=False)
+        return self._etree
+
+    def parse(self, source: BinaryIO):
+        etree = self._lxml()
+        if etree is None:
+            return ElementTree(file=source)
+        return etree.parse(source, self._parser)
+
+    def element(self, tag: str):
+        etree = self._lxml()
+        if etree is None:
+            return Element(tag)
+        return etree.Element(tag)
+
+    @staticmethod
+    def sub_element(parent, tag: str):
+        # makeelement works on both kinds of element, whichever backend built the parent.
+        element = parent.makeelement(tag, {})
+        parent.append(element)
+        return element
+
+    def write(self, element, path: str, encoding: str = "utf-8", xml_declaration: Optional[bool] = None,
+              short_empty_elements: bool = True):
+        root = element.getroot() if hasattr(element, "getroot") else element
+        etree = self._lxml()
+        if etree is None or short_empty_elements or xml_declaration or encoding.lower() != "utf-8" \
+                or not _prepare_lxml(root):
+            pretty_writer.write(root, path, encoding=encoding, xml_declaration=xml_declaration,
+                                short_empty_elements=short_empty_elements)
+            return
+        with stats.phase("serialize"):
+            etree.indent(root, space="    ")
+            content = etree.tostring(root, encoding="utf-8") + b"\n"
+            # Put the tree back the way it was, callers like serialize_many write it again.
+            for item in root.iter():
+                item.tail = None
+                if len(item):
+                    item.text = None
+        with stats.phase("write"), open(path, mode="wb") as file:
+            file.write(content)
+        stats.count("files written")
+
+
+def _prepare_lxml(root) -> bool:
+    # lxml lays out plain element trees exactly like the default PrettyXmlWriter. Mixed content, attributes (sorted by
+    # PrettyXmlWriter), namespaces and carriage returns (escaped by lxml only) are left to PrettyXmlWriter.
+    for element in root.iter():
+        tag = element.tag
+        text = element.text
+        if not isinstance(tag, str) or tag[:1] == "{" or element.tail is not None or len(element.attrib) > 0:
+            return False
+        if len(element):
+            if text is not None:
+                return False
+        elif text is None:
+            # Written as <tag></tag> like short_empty_elements=False.
+            element.text = ""
+        elif "\r" in text:
+            return False
+    return True
 
-etree.ElementTree._serialize_xml = _serialize_xml
-# noinspection PyProtectedMember
-etree.ElementTree._serialize["xml"] = _serialize_xml
 
-# ============================   Hack End   ============================
+pretty_writer = PrettyXmlWriter()
+xml_backend = XmlBackend()
@@ -55,6 +55,21 @@ class Argument(Generic[T]):
             return
         dict[key] = value
 
+    @property
+    def positional(self) -> bool:
+        return self._abbr is None
+
+    def to_argv(self, value) -> List[str]:
+        if self._type == bool:
+            return [f"--{self.name}"] if bool(value) != bool(self._default) else []
+        values = [str(item) for item in value] if isinstance(value, list) else [str(value)]
+        if self._abbr is None or not values:
+            return values
+        # The attached form keeps a value starting with "-" from being read as an option.
+        if len(values) == 1:
+            return [f"--{self.name}={values[0]}"]
+        return [f"--{self.name}", *values]
+
     def ask_input(self) -> Optional[Union[T, List[T]]]:
         has_default = self._default is not None or self._allow_default_none
         default_value = self._default
@@ -0,0 +1,124 @@
+import json
+import sys
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from threading import local
+from time import perf_counter
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from tool.commands import Command, commands
+from tool.shared import shared
+
+_excluded = ["batch", "watch"]
+
+
+class _JobResult(NamedTuple):
+    name: str
+    elapsed: float
+    error: Optional[str]
+    output: str
+
+
+class _JobParser(ArgumentParser):
+    # Also used for the subparsers, report invalid fields on the job instead of exiting.
+    def error(self, message: str):
+        raise ValueError(message)
+
+
+class _ThreadOutput:
+    # sys.stdout is process wide, each job thread writes to its own buffer instead.
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = local()
+
+    def capture(self) -> StringIO:
+        self._local.buffer = StringIO()
+        return self._local.buffer
+
+    def release(self):
+        self._local.buffer = None
+
+    def write(self, text: str) -> int:
+        buffer = getattr(self._local, "buffer", None)
+        return (buffer if buffer is not None else self._stream).write(text)
+
+    def flush(self):
+        self._stream.flush()
+
+
+def _batch(args):
+    with open(args.file, mode="r", encoding="utf-8") as file:
+        jobs = json.load(file)
+    if not isinstance(jobs, list):
+        print(f"{args.file}: expected a list of jobs")
+        return
+    output = _ThreadOutput(sys.stdout)
+    sys.stdout = output
+    shared.enabled = True
+    try:
+        if args.parallel > 1:
+            with ThreadPoolExecutor(max_workers=args.parallel) as executor:
+                results = list(executor.map(lambda item: _run_job(*item, output), enumerate(jobs, start=1)))
+        else:
+            results = [_run_job(number, job, output) for number, job in enumerate(jobs, start=1)]
+    finally:
+        sys.stdout = output._stream
+        shared.enabled = False
+        shared.clear()
+    for result in results:
+        if result.output:
+            print(f"[{result.name}]")
+            print(result.output, end="")
+    for result in results:
+        status = "OK" if result.error is None else f"Failed: {result.error}"
+        print(f"{result.name}: {result.elapsed:.2f}s {status}")
+    failed = sum(result.error is not None for result in results)
+    print(f"Jobs: {len(results)}, Succeeded: {len(results) - failed}, Failed: {failed}")
+    if failed:
+        sys.exit(1)
+
+
+def _run_job(number: int, job: Any, output: _ThreadOutput) -> _JobResult:
+    name = f"{number}"
+    buffer = output.capture()
+    start = perf_counter()
+    try:
+        if not isinstance(job, dict) or "command" not in job:
+            raise ValueError("Job is not an object with a command.")
+        name = f"{number}. {job.get('label', job['command'])}"
+        command = _find_command(job["command"])
+        command.load()(_parse_job(command, job))
+        error = None
+    except SystemExit as e:
+        error = f"exit status {e.code}" if e.code else None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    finally:
+        output.release()
+    return _JobResult(name, perf_counter() - start, error, buffer.getvalue())
+
+
+def _find_command(name: str) -> Command:
+    for command in commands:
+        if command.name == name and name not in _excluded:
+            return command
+    raise ValueError(f"{name} cannot be run in a batch.")
+
+
+def _parse_job(command: Command, job: Dict[str, Any]):
+    arguments = {argument.name: argument for argument in command.arguments}
+    unknown = job.keys() - arguments.keys() - {"command", "label"}
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(sorted(unknown))}")
+    options = []  # type: List[str]
+    positionals = []  # type: List[str]
+    for key, value in job.items():
+        if key not in arguments or value is None:
+            continue
+        argument = arguments[key]
+        (positionals if argument.positional else options).extend(argument.to_argv(value))
+    # The same parser as the command line, so the fields are converted, validated and defaulted alike.
+    parser = _JobParser(prog="batch")
+    command.add_parser(parser.add_subparsers(dest="command"))
+    return parser.parse_args([command.name, *options, *(["--", *positionals] if positionals else [])])
@@ -1,44 +1,158 @@
+import hashlib
 import json
+import mmap
 import re
-from os.path import basename, splitext
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from os import stat, replace, remove
+from os.path import basename, splitext, isfile, join
+from typing import Dict, Tuple, Optional, Iterable, List
 
-from tool import valid_dir, find_files
-from tool.argument import Argument, add_arguments, ask_inputs
+from tool import find_files, convert_size
+from tool.stats import stats
+from tool.store import open_cast_store
 
-_arguments = [
-    Argument("input", abbr="i", type=valid_dir, default=".", meta="<Input folder>",
-             help="Source folder (default: current)"),
-    Argument("output", abbr="o", type=str, default="cast.json", meta="<Output folder>",
-             help="Output file (default: %(default)s)"),
-    Argument("prefix", abbr="p", type=str, default="", meta="<prefix>",
-             help="Prefix of generated url(s) (default: None)")
-]
+_patterns = ["*.png", "*.jpg", "*.jpeg", "*.gif"]
+_version_pattern = re.compile(r"^(.*)\.(\d+)$")
+_hash_chunk_size = 1024 * 1024
 
-
-def create_subparser(subparsers):
-    command = "cast"
-    parser = subparsers.add_parser(command, help="Create cast.json.")
-    add_arguments(parser, _arguments)
-    return command, _cast
+# Hash cache record: [size, mtime, digest]
+_HashRecord = list
 
 
 def _cast(args):
-    if args is None:
-        args = ask_inputs(_arguments)
-    casts = {}
-    versions = {}
-    for file in find_files(args.input, ["*.png", "*.jpg", "*.jpeg", "*.gif"], recursive=False):
-        fullname = basename(file)
-        name = splitext(fullname)[0]
-        result = re.search("(.*)\.(\d*)", name, re.IGNORECASE)
-        if result:
-            name = result.group(1)
-            version = int(result.group(2))
+    state_path = args.output + ".state"
+    state = None
+    store = open_cast_store(args.output)
+    try:
+        if args.convert is not None:
+            source = open_cast_store(args.convert)
+            casts = dict(source.items())
+            source.close()
         else:
-            version = 0
+            previous = _read_state(state_path) if args.incremental and isfile(args.output) else None
+            casts, state = _scan_casts(args, store, previous)
+            if args.dedupe:
+                casts = _dedupe_casts(args, casts)
+        with stats.phase("write"):
+            store.replace(casts)
+    finally:
+        store.close()
+    # Only written once the store is saved, so the state never describes a newer table than the store holds. Other
+    # runs remove it, a later -I run must not trust a state the store has moved past.
+    if state is not None and args.incremental:
+        temp_path = state_path + ".tmp"
+        with open(temp_path, encoding="utf-8", mode="w") as file:
+            json.dump(state, file, ensure_ascii=False)
+        replace(temp_path, state_path)
+    elif isfile(state_path):
+        remove(state_path)
+
+
+def _parse_name(fullname: str) -> Tuple[str, int]:
+    name = splitext(fullname)[0]
+    result = _version_pattern.match(name)
+    if result:
+        return result.group(1), int(result.group(2))
+    return name, 0
+
+
+def _create_casts(files: Iterable[Tuple[str, Tuple[str, int]]], prefix: str,
+                  casts: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    if casts is None:
+        casts = {}
+    versions = {}
+    for fullname, (name, version) in files:
         if name not in casts or versions[name] < version:
-            casts[name] = args.prefix + fullname
+            casts[name] = prefix + fullname
             versions[name] = version
-    json_str = json.dumps(casts, indent=4, sort_keys=True, ensure_ascii=False)
-    with open(args.output, encoding="utf-8", mode="w") as file:
-        file.write(json_str)
+    return casts
+
+
+def _read_state(path: str) -> Optional[dict]:
+    if not isfile(path):
+        return None
+    with open(path, encoding="utf-8", mode="r") as file:
+        return json.load(file)
+
+
+def _scan_casts(args, store, previous: Optional[dict]) -> Tuple[Dict[str, str], dict]:
+    mtime = stat(args.input).st_mtime
+    same_options = previous is not None and previous["prefix"] == args.prefix and \
+        previous.get("dedupe", False) == args.dedupe
+    if same_options and previous["mtime"] == mtime:
+        return dict(store.items()), previous
+    files = (basename(file) for file in find_files(args.input, _patterns, recursive=False))
+    current = {fullname: _parse_name(fullname) for fullname in files}
+    state = {"prefix": args.prefix, "dedupe": args.dedupe, "mtime": mtime, "files": current}
+    # A deduped url can point at another actor's image, so removing it affects names outside of the changed set.
+    if not same_options or args.dedupe:
+        return _create_casts(current.items(), args.prefix), state
+    previous_files = previous["files"]
+    changed = {current[f][0] for f in current.keys() - previous_files.keys()} | \
+              {previous_files[f][0] for f in previous_files.keys() - current.keys()}
+    casts = dict(store.items())
+    for name in changed:
+        casts.pop(name, None)
+    casts = _create_casts(((f, v) for f, v in current.items() if v[0] in changed), args.prefix, casts)
+    return casts, state
+
+
+def _dedupe_casts(args, casts: Dict[str, str]) -> Dict[str, str]:
+    cache_path = args.output + ".hashes"
+    cache = {}  # type: Dict[str, _HashRecord]
+    if isfile(cache_path):
+        with open(cache_path, encoding="utf-8", mode="r") as file:
+            cache = json.load(file)
+    by_size = defaultdict(list)  # type: Dict[int, List[str]]
+    records = {}  # type: Dict[str, _HashRecord]
+    for fullname in {url[len(args.prefix):] for url in casts.values()}:
+        file_stat = stat(join(args.input, fullname))
+        record = cache.get(fullname)
+        if record is None or record[0] != file_stat.st_size or record[1] != file_stat.st_mtime:
+            record = [file_stat.st_size, file_stat.st_mtime, None]
+        records[fullname] = record
+        by_size[file_stat.st_size].append(fullname)
+    # Only images sharing their size with another one can be duplicates, the rest are never read.
+    pending = [fullname for names in by_size.values() if len(names) > 1 for fullname in names
+               if records[fullname][2] is None]
+    with stats.phase("hash"), ThreadPoolExecutor(max_workers=max(args.jobs, 1)) as executor:
+        for fullname, digest in zip(pending, executor.map(_hash_file, (join(args.input, f) for f in pending))):
+            records[fullname][2] = digest
+    with open(cache_path, encoding="utf-8", mode="w") as file:
+        json.dump(records, file, ensure_ascii=False)
+
+    groups = defaultdict(list)  # type: Dict[Tuple[int, str], List[str]]
+    for fullname, (size, _, digest) in records.items():
+        if digest is not None:
+            groups[(size, digest)].append(fullname)
+    canonical = {}  # type: Dict[str, str]
+    reclaimable = 0
+    duplicates = 0
+    for (size, _), names in sorted(groups.items(), key=lambda item: min(item[1])):
+        if len(names) < 2:
+            continue
+        names.sort()
+        for fullname in names[1:]:
+            canonical[fullname] = names[0]
+        reclaimable += size * (len(names) - 1)
+        duplicates += 1
+        print(f"Duplicate: {names[0]} <- {', '.join(names[1:])}")
+    print(f"Duplicates: {duplicates} group(s), {len(canonical)} file(s), {convert_size(reclaimable)} reclaimable")
+    return {name: args.prefix + canonical.get(url[len(args.prefix):], url[len(args.prefix):])
+            for name, url in casts.items()}
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.blake2b()
+    with open(path, mode="rb") as file:
+        try:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped.
+            return digest.hexdigest()
+        # hashlib releases the GIL on large updates, so the thread pool hashes in parallel.
+        with data, memoryview(data) as view:
+            for offset in range(0, len(view), _hash_chunk_size):
+                digest.update(view[offset:offset + _hash_chunk_size])
+    return digest.hexdigest()
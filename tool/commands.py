@@ -0,0 +1,174 @@
+from importlib import import_module
+from typing import Callable, List, NamedTuple
+
+from tool import valid_date, valid_dir, valid_file, valid_path
+from tool.argument import Argument, add_arguments, ask_inputs
+
+
+class Command(NamedTuple):
+    name: str
+    help: str
+    arguments: List[Argument]
+    # "<module>:<function>", only imported when the command runs so startup does not pay for every dependency.
+    target: str
+
+    def add_parser(self, subparsers):
+        parser = subparsers.add_parser(self.name, help=self.help)
+        add_arguments(parser, self.arguments)
+        return parser
+
+    def load(self) -> Callable:
+        module, func = self.target.split(":")
+        return getattr(import_module(module), func)
+
+    def run(self, args=None):
+        if args is None:
+            args = ask_inputs(self.arguments)
+        self.load()(args)
+
+
+_create_arguments = [
+    Argument("name", type=str, meta="<show name>"),
+    Argument("output", abbr="o", type=valid_dir, default="", meta="<output directory>",
+             help="Output directory of the xml(s) (default: current)"),
+    Argument("season", abbr="s", type=int, default=1, meta="<season number>",
+             help="Season number of the xml(s) (default: %(default)s)"),
+    Argument("date", abbr="D", type=valid_date, default=None, allow_default_none=True, meta="<start date>",
+             help="Start date of the xml file(s) (default: %(default)s)"),
+    Argument("mpaa", abbr="m", type=str, default=None, allow_default_none=True, meta="<mpaa>",
+             help="Common mpaa of all the generate xml(s)"),
+    Argument("directors", abbr="d", type=str, default=[], nargs="+", meta="<director(s) name>",
+             help="Common director(s) of all the generate xml(s)"),
+    Argument("writers", abbr="w", type=str, default=[], nargs="+", meta="<writer(s) name>",
+             help="Common writer(s) of all the generate xml(s)"),
+    Argument("producers", abbr="p", type=str, default=[], nargs="+", meta="<producer(s) name>",
+             help="Common producer(s) of all the generate xml(s)"),
+    Argument("guests", abbr="g", type=str, default=[], nargs="+", meta="<guest(s) name>",
+             help="Common guest(s) of all the generate xml(s)"),
+    Argument("increment", abbr="i", type=int, default=7, meta="<number of day(s)>",
+             help="Number of day(s) between each episode (default: %(default)s)"),
+    Argument("start_episode", abbr="S", type=int, default=1, meta="<start episode>",
+             help="Episode number of the start (inclusive) (default: %(default)s)"),
+    Argument("end_episode", abbr="E", type=int, default=12, meta="<end episode>",
+             help="Episode number of the end (inclusive) (default: %(default)s)"),
+    Argument("rating", abbr="r", type=float, default=None, allow_default_none=True, meta="<rating>",
+             help="Common rating(s) of all the generate xml(s)"),
+    Argument("title", abbr="t", type=str, default="", meta="<title>", help="Common title(s) of all the generate xml(s)"),
+    Argument("manifest", abbr="f", type=valid_file, default=None, allow_default_none=True, meta="<manifest>",
+             help="JSON lines or CSV file with one episode per row. Row fields override the common options.")
+]
+
+_thumb_arguments = [
+    Argument("cast", abbr="c", type=valid_file, default="cast.json", meta="<cast JSON>",
+             help="Cast JSON or SQLite store used for update (default: cast.json)"),
+    Argument("input", abbr="i", type=valid_dir, default=".", meta="<input directory>",
+             help="Directory scanned for xml(s) (default: current)"),
+    Argument("day", abbr="d", type=int, default=1, meta="<last modify>",
+             help="Day difference of xml to be updated. (default: %(default)s)"),
+    Argument("jobs", abbr="j", type=int, default=1, meta="<number of job(s)>",
+             help="Number of worker process(es) used to update xml(s) (default: %(default)s)"),
+    Argument("index", abbr="x", type=str, default=".thumb_index.json", meta="<index file>",
+             help="Scan index, relative to the input directory, used to skip unchanged directories, "
+                  "empty to disable (default: %(default)s)"),
+    Argument("rebuild_index", abbr="R", type=bool, default=False, meta="<rebuild index>",
+             help="Ignore the existing scan index and rescan every directory"),
+    Argument("normalized", abbr="N", type=bool, default=False, meta="<normalized>",
+             help="Match actor names ignoring width, case, spacing and NFKC form"),
+    Argument("distance", abbr="e", type=int, default=0, meta="<edit distance>",
+             help="Max edit distance when no normalized name matches, 0 to disable (default: %(default)s)"),
+    Argument("report", abbr="r", type=str, default=None, allow_default_none=True, meta="<report file>",
+             help="Write undefined and ambiguous actors with counts and files to a JSON or CSV file"),
+    Argument("sample", abbr="k", type=int, default=10, meta="<number of file(s)>",
+             help="Number of referencing files kept per actor in the report (default: %(default)s)")
+]
+
+_cast_arguments = [
+    Argument("input", abbr="i", type=valid_dir, default=".", meta="<Input folder>",
+             help="Source folder (default: current)"),
+    Argument("output", abbr="o", type=str, default="cast.json", meta="<Output folder>",
+             help="Output file, .db/.sqlite for a SQLite store (default: %(default)s)"),
+    Argument("prefix", abbr="p", type=str, default="", meta="<prefix>",
+             help="Prefix of generated url(s) (default: None)"),
+    Argument("incremental", abbr="I", type=bool, default=False, meta="<incremental>",
+             help="Only apply images added or removed since the last run"),
+    Argument("convert", abbr="C", type=valid_file, default=None, allow_default_none=True, meta="<cast file>",
+             help="Copy an existing cast JSON or SQLite store into the output instead of scanning images"),
+    Argument("dedupe", abbr="D", type=bool, default=False, meta="<dedupe>",
+             help="Point actors with identical images at one url and report the duplicates"),
+    Argument("jobs", abbr="j", type=int, default=4, meta="<number of thread(s)>",
+             help="Number of thread(s) used to hash images for dedupe (default: %(default)s)")
+]
+
+_normalize_arguments = [
+    Argument("path", type=valid_path, meta="<file or directory>"),
+    Argument("pattern", abbr="p", type=str, default=["*.xml"], meta="<pattern(s)>",
+             help="File pattern(s) to normalize when <path> is a directory (default: %(default)s)"),
+    Argument("jobs", abbr="j", type=int, default=1, meta="<number of job(s)>",
+             help="Number of worker process(es) used to normalize file(s) (default: %(default)s)")
+]
+
+_youtube_arguments = [
+    Argument("yid", type=str, meta="<youtube playlist id>"),
+    Argument("prefix", abbr="p", type=str, default=None, meta="<prefix>", help="Output file name prefix"),
+    Argument("output", abbr="o", type=valid_dir, default="output", meta="<output directory>",
+             help="Output directory of the xml(s) (default: current)"),
+    Argument("season", abbr="s", type=int, default=1, meta="<season number>",
+             help="Season number of the xml(s) (default: %(default)s)"),
+    Argument("mpaa", abbr="m", type=str, default=None, allow_default_none=True, meta="<mpaa>",
+             help="Common mpaa of all the generate xml(s)"),
+    Argument("list", abbr="t", type=bool, default=False, meta="<list>",
+             help="Is youtube playlist"),
+    Argument("concurrency", abbr="c", type=int, default=1, meta="<number of download(s)>",
+             help="Number of playlist video(s) downloaded at the same time (default: %(default)s)")
+]
+
+_watch_arguments = [
+    Argument("cast", abbr="c", type=valid_file, default="cast.json", meta="<cast JSON>",
+             help="Cast JSON or SQLite store used for update (default: cast.json)"),
+    Argument("normalize", abbr="n", type=bool, default=False, meta="<normalize>",
+             help="Also normalize changed xml(s) before updating <thumb>"),
+    Argument("interval", abbr="i", type=float, default=2, meta="<second(s)>",
+             help="Polling interval when inotify is not available (default: %(default)s)"),
+    Argument("debounce", abbr="b", type=float, default=1, meta="<second(s)>",
+             help="Quiet time before a changed xml is processed (default: %(default)s)"),
+    Argument("normalized", abbr="N", type=bool, default=False, meta="<normalized>",
+             help="Match actor names ignoring width, case, spacing and NFKC form"),
+    Argument("distance", abbr="e", type=int, default=0, meta="<edit distance>",
+             help="Max edit distance when no normalized name matches, 0 to disable (default: %(default)s)")
+]
+
+_transform_names = ["thumb", "normalize", "strip"]
+
+
+def _valid_transform(name: str) -> str:
+    if name in _transform_names:
+        return name
+    raise ValueError("{0} is not a transform ({1})".format(name, ", ".join(_transform_names)))
+
+
+_run_arguments = [
+    Argument("transforms", type=_valid_transform, default=[], nargs="+", meta="<transform(s)>",
+             help=f"Transforms applied in order to each xml, written once: {', '.join(_transform_names)}"),
+    # Only checked when thumb is one of the transforms.
+    Argument("cast", abbr="c", type=str, default="cast.json", meta="<cast JSON>",
+             help="Cast JSON or SQLite store used by thumb (default: cast.json)"),
+    *(argument for argument in _thumb_arguments if argument.name != "cast")
+]
+
+_batch_arguments = [
+    Argument("file", type=valid_file, meta="<jobs JSON>"),
+    Argument("parallel", abbr="p", type=int, default=1, meta="<number of job(s)>",
+             help="Number of job(s) run at the same time, jobs on the same directory take turns "
+                  "(default: %(default)s)")
+]
+
+commands = [
+    Command("create", "Generate xml file(s).", _create_arguments, "tool.create:_create"),
+    Command("thumb", "Update <thumb> in xml file(s).", _thumb_arguments, "tool.thumb:_thumb"),
+    Command("cast", "Create cast.json.", _cast_arguments, "tool.cast:_cast"),
+    Command("normalize", "Normalize string in xml file(s).", _normalize_arguments, "tool.normalize:_normal"),
+    Command("youtube", "Generate xml file(s).", _youtube_arguments, "tool.youtube:_download_youtube_playlist"),
+    Command("watch", "Update <thumb> in xml file(s) whenever they change.", _watch_arguments, "tool.watch:_watch"),
+    Command("run", "Apply several transforms to xml file(s) in one pass.", _run_arguments, "tool.run:_run"),
+    Command("batch", "Run the commands listed in a JSON file in one process.", _batch_arguments, "tool.batch:_batch")
+]
@@ -0,0 +1,126 @@
+import json
+from os import scandir, stat, replace
+from os.path import join, isfile, sep
+from typing import Dict, List, Optional, Iterator, Tuple
+
+from tool import any_match
+
+# File record: [mtime, size, root tag]
+_FileRecord = list
+
+
+class ScanIndex:
+    _version = 1
+
+    def __init__(self, path: str, rebuild: bool = False):
+        self.path = path  # type: str
+        self._dirs = {}  # type: Dict[str, dict]
+        self._found = {}  # type: Dict[str, Tuple[Dict[str, Optional[_FileRecord]], str]]
+        self._changed = False  # type: bool
+        if not rebuild and isfile(path):
+            self._load()
+        else:
+            self._changed = True
+
+    def _load(self):
+        try:
+            with open(self.path, mode="r", encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            self._changed = True
+            return
+        if data.get("version") == self._version:
+            self._dirs = data["dirs"]
+        else:
+            self._changed = True
+
+    def save(self):
+        if not self._changed:
+            return
+        temp_path = self.path + ".tmp"
+        with open(temp_path, mode="w", encoding="utf-8") as file:
+            json.dump({"version": self._version, "dirs": self._dirs}, file, ensure_ascii=False, separators=(",", ":"))
+        replace(temp_path, self.path)
+        self._changed = False
+
+    def find(self, directory: str, patterns: List[str], cutoff: Optional[float] = None) -> Iterator[str]:
+        stack = [directory]
+        while stack:
+            path = stack.pop()
+            try:
+                mtime = stat(path).st_mtime
+            except OSError:
+                self._forget(path)
+                continue
+            if path != directory and cutoff is not None and mtime <= cutoff:
+                continue
+            entry, verify = self._entry(path, mtime)
+            files = entry["files"]
+            for name in list(files.keys()):
+                if not any_match(name, patterns):
+                    continue
+                file_path = join(path, name)
+                record = self._record(files, name, file_path, verify)
+                if record is not None and (cutoff is None or record[0] > cutoff):
+                    self._found[file_path] = (files, name)
+                    yield file_path
+            stack.extend(join(path, d) for d in reversed(entry["dirs"]))
+
+    def get_tag(self, path: str) -> Optional[str]:
+        if path not in self._found:
+            return None
+        files, name = self._found[path]
+        record = files.get(name)
+        return record[2] if record is not None else None
+
+    def set_tag(self, path: str, tag: Optional[str]):
+        if path not in self._found:
+            return
+        files, name = self._found[path]
+        files[name] = None
+        record = self._record(files, name, path, True)
+        if record is not None:
+            record[2] = tag
+
+    def _entry(self, path: str, mtime: float) -> Tuple[dict, bool]:
+        entry = self._dirs.get(path)
+        if entry is not None and entry["mtime"] == mtime:
+            return entry, False
+        old_files = entry["files"] if entry is not None else {}
+        dirs = []  # type: List[str]
+        files = {}  # type: Dict[str, Optional[_FileRecord]]
+        with scandir(path) as it:
+            for item in it:
+                if item.is_dir():
+                    if not item.is_symlink() and not item.name.startswith("."):
+                        dirs.append(item.name)
+                else:
+                    files[item.name] = old_files.get(item.name)
+        if entry is not None:
+            for removed in set(entry["dirs"]) - set(dirs):
+                self._forget(join(path, removed))
+        entry = {"mtime": mtime, "dirs": dirs, "files": files}
+        self._dirs[path] = entry
+        self._changed = True
+        return entry, True
+
+    def _record(self, files: Dict[str, Optional[_FileRecord]], name: str, path: str,
+                verify: bool) -> Optional[_FileRecord]:
+        record = files[name]
+        if record is not None and not verify:
+            return record
+        try:
+            file_stat = stat(path)
+        except OSError:
+            return None
+        if record is None or record[0] != file_stat.st_mtime or record[1] != file_stat.st_size:
+            record = [file_stat.st_mtime, file_stat.st_size, None]
+            files[name] = record
+            self._changed = True
+        return record
+
+    def _forget(self, path: str):
+        prefix = path + sep
+        for key in [k for k in self._dirs.keys() if k == path or k.startswith(prefix)]:
+            del self._dirs[key]
+            self._changed = True
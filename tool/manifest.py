@@ -0,0 +1,74 @@
+import csv
+import json
+from datetime import datetime
+from os.path import splitext
+from typing import Iterator, Optional, Dict, Any, List, Tuple
+
+from tool import valid_date
+from tool.plex import Episode
+
+_list_fields = ["directors", "writers", "producers", "guests"]
+_list_separator = "|"
+
+
+class ManifestReader:
+    def __init__(self, path: str, defaults: Optional[Dict[str, Any]] = None):
+        self.path = path  # type: str
+        self._defaults = defaults if defaults is not None else {}  # type: Dict[str, Any]
+        self.errors = 0  # type: int
+
+    def __iter__(self) -> Iterator[Episode]:
+        for line_num, row in self._read_rows():
+            try:
+                if not isinstance(row, dict):
+                    raise ValueError("Row is not an object.")
+                yield self._create_episode(row)
+            except (ValueError, TypeError) as e:
+                self.errors += 1
+                print(f"{self.path}:{line_num}: {e}")
+
+    def _read_rows(self) -> Iterator[Tuple[int, Any]]:
+        with open(self.path, mode="r", encoding="utf-8", newline="") as file:
+            if splitext(self.path)[1].lower() == ".csv":
+                reader = csv.DictReader(file)
+                for row in reader:
+                    yield reader.line_num, {k: v for k, v in row.items() if k is not None and v != ""}
+            else:
+                for line_num, line in enumerate(file, start=1):
+                    if not line.strip():
+                        continue
+                    try:
+                        yield line_num, json.loads(line)
+                    except ValueError as e:
+                        self.errors += 1
+                        print(f"{self.path}:{line_num}: {e}")
+
+    def _create_episode(self, row: Dict[str, Any]) -> Episode:
+        values = {**self._defaults, **row}
+        if "episode" not in values:
+            raise ValueError("Missing episode number.")
+        aired = values.get("aired")
+        if isinstance(aired, str):
+            aired = valid_date(aired)
+        elif aired is not None and not isinstance(aired, datetime):
+            raise ValueError(f"Invalid date: {aired}")
+        rating = values.get("rating")
+        return Episode(name=values.get("name"),
+                       season=int(values.get("season", 1)),
+                       episode=int(values["episode"]),
+                       title=values.get("title"),
+                       aired=aired,
+                       mpaa=values.get("mpaa"),
+                       plot=values.get("plot"),
+                       rating=float(rating) if rating is not None else None,
+                       **{field: _parse_list(values.get(field)) for field in _list_fields})
+
+
+def _parse_list(value) -> Optional[List[str]]:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(_list_separator) if item.strip()]
+    if isinstance(value, list):
+        return [str(item) for item in value]
+    raise ValueError(f"Invalid list: {value}")
@@ -0,0 +1,95 @@
+from collections import defaultdict
+from typing import Dict, Optional, Tuple, List, Set
+from unicodedata import normalize
+
+_ambiguous = object()
+_gram_size = 3
+
+
+def normalize_name(name: str) -> str:
+    # Names are parsed text, unlike normal there is no markup to protect, so "＆" and "&" get the same key.
+    return " ".join(normalize("NFKC", name).casefold().split())
+
+
+class CastMatcher:
+    def __init__(self, casts, normalize: bool = False, distance: int = 0):
+        self._casts = casts
+        self._normalize = normalize or distance > 0  # type: bool
+        self._distance = distance  # type: int
+        self._keys = None  # type: Optional[Dict[str, object]]
+        self._grams = None  # type: Optional[Dict[str, List[str]]]
+        self._cache = {}  # type: Dict[str, Tuple[Optional[str], bool]]
+
+    def match(self, name: Optional[str]) -> Tuple[Optional[str], bool]:
+        thumb = self._casts.get(name)
+        if thumb is not None or not self._normalize or name is None:
+            return thumb, False
+        if name not in self._cache:
+            self._cache[name] = self._match_key(normalize_name(name))
+        return self._cache[name]
+
+    def _match_key(self, key: str) -> Tuple[Optional[str], bool]:
+        keys = self._build_keys()
+        thumb = keys.get(key)
+        if thumb is None and self._distance > 0:
+            thumb = self._match_fuzzy(key)
+        if thumb is _ambiguous:
+            return None, True
+        return thumb, False
+
+    def _build_keys(self) -> Dict[str, object]:
+        if self._keys is None:
+            self._keys = {}
+            for name, thumb in self._casts.items():
+                key = normalize_name(name)
+                if self._keys.get(key, thumb) != thumb:
+                    thumb = _ambiguous
+                self._keys[key] = thumb
+        return self._keys
+
+    def _match_fuzzy(self, key: str):
+        if self._grams is None:
+            self._grams = defaultdict(list)
+            for candidate in self._build_keys().keys():
+                for gram in _grams(candidate):
+                    self._grams[gram].append(candidate)
+        grams = _grams(key)
+        # q-gram lemma: strings within distance d share at least len(grams) - q * d grams.
+        required = len(grams) - _gram_size * self._distance
+        counts = defaultdict(int)  # type: Dict[str, int]
+        for gram in grams:
+            for candidate in self._grams.get(gram, []):
+                counts[candidate] += 1
+        best = self._distance + 1
+        thumbs = set()  # type: Set[object]
+        for candidate, count in counts.items():
+            if count < required or abs(len(candidate) - len(key)) > self._distance:
+                continue
+            distance = bounded_distance(key, candidate, self._distance)
+            if distance < best:
+                best = distance
+                thumbs = {self._keys[candidate]}
+            elif distance == best:
+                thumbs.add(self._keys[candidate])
+        if not thumbs:
+            return None
+        return thumbs.pop() if len(thumbs) == 1 else _ambiguous
+
+
+def _grams(key: str) -> List[str]:
+    padded = f"  {key}  "
+    return [padded[i:i + _gram_size] for i in range(len(padded) - _gram_size + 1)]
+
+
+def bounded_distance(a: str, b: str, limit: int) -> int:
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return min(previous[-1], limit + 1)
@@ -1,38 +1,110 @@
-from unicodedata import normalize
+from concurrent.futures import ProcessPoolExecutor
+from os import replace, remove
+from os.path import isdir, exists
+from shutil import copymode
+from typing import Iterator, Tuple
+from unicodedata import normalize, is_normalized
 
-from tool import valid_file, replace_words, invert_dict
-from tool.argument import Argument
+from tool import replace_words, invert_dict, find_files, temp_name
+from tool.shared import shared
+from tool.stats import stats, enable
 
-_argument = Argument("file", type=valid_file, meta="<file>")
+_chunk_size = 1024 * 1024
 
 
-def create_subparser(subparsers):
-    command = "normalize"
-    parser = subparsers.add_parser(command, help="Normalize string in xml file.")
-    _argument.add_argument(parser)
-    return command, _normal
+def _normal(args):
+    with shared.lock_path(args.path):
+        if not isdir(args.path):
+            normal_file(args.path)
+            return
+        files = list(find_files(args.path, args.pattern))
+        if args.jobs > 1:
+            with ProcessPoolExecutor(max_workers=args.jobs, initializer=enable,
+                                     initargs=(stats.enabled,)) as executor:
+                modified = sum(stats.merge_results(executor.map(_normal_worker, files, chunksize=16)))
+        else:
+            modified = sum(normal_file(file) for file in files)
+    print(f"Scanned: {len(files)}, Modified: {modified}, Skipped: {len(files) - modified}")
 
 
-def _normal(args):
-    if args is None:
-        file_path = _argument.ask_input()
-    else:
-        file_path = args.file
-    with open(file_path, mode="r+", encoding="utf-8") as file:
-        content = normal(file.read())
-        file.seek(0)
-        file.write(content)
-        file.truncate()
+def _normal_worker(path: str):
+    return normal_file(path), stats.pop()
+
+
+def normal_file(path: str) -> bool:
+    temp_path = temp_name(path)
+    modified = False
+    try:
+        with open(path, mode="r", encoding="utf-8") as source, \
+                open(temp_path, mode="w", encoding="utf-8") as target:
+            for chunk in stats.iterate("read", _read_chunks(source)):
+                with stats.phase("transform"):
+                    content = normal(chunk)
+                modified = modified or content != chunk
+                with stats.phase("write"):
+                    target.write(content)
+        stats.count("files read")
+        if modified:
+            copymode(path, temp_path)
+            replace(temp_path, path)
+            stats.count("files written")
+    finally:
+        if exists(temp_path):
+            remove(temp_path)
+    return modified
+
+
+def _read_chunks(file) -> Iterator[str]:
+    # Chunks are cut after a newline (or before a space) so no replacement word or NFKC composition spans two chunks.
+    pending = ""
+    while True:
+        data = file.read(_chunk_size)
+        if not data:
+            break
+        pending += data
+        chunk, pending = _split_chunk(pending)
+        if chunk:
+            yield chunk
+    if pending:
+        yield pending
+
+
+def _split_chunk(content: str) -> Tuple[str, str]:
+    index = content.rfind("\n") + 1
+    if index <= 0:
+        index = content.rfind(" ")
+    if index <= 0:
+        return "", content
+    return content[:index], content[index:]
 
 
 def normal(source: str) -> str:
     content = replace_words(source, _before)
-    content = normalize("NFKC", content)
+    content = _normalize_nfkc(content)
     return replace_words(content, _after)
 
 
+def normal_text(source: str) -> str:
+    # Parsed character data holds "&" where the file holds "&amp;", so it must end up as the "＆" normal gives.
+    content = replace_words(source, _text_before)
+    content = _normalize_nfkc(content)
+    return replace_words(content, _text_after)
+
+
+def _normalize_nfkc(content: str) -> str:
+    if is_normalized("NFKC", content):
+        return content
+    # "\n" never composes with its neighbours, so lines can be normalized on their own and ASCII lines skipped.
+    lines = content.split("\n")
+    for index, line in enumerate(lines):
+        if not line.isascii():
+            lines[index] = normalize("NFKC", line)
+    return "\n".join(lines)
+
+
 _before = {
     "～": "$wave%",
+    "＜": "$lt%",
     "＆": "&amp;"
 }
 
@@ -42,3 +114,16 @@ _after = {
     "．．．": "…",
     "・・・": "…"
 }
+
+_text_before = {
+    "～": "$wave%",
+    "＜": "$lt%"
+}
+
+_text_after = {
+    **invert_dict(_text_before),
+    "&": "＆",
+    "...": "…",
+    "．．．": "…",
+    "・・・": "…"
+}
@@ -1,58 +1,142 @@
 from datetime import datetime
 from os.path import join
-from typing import Optional, List
-from xml.etree.ElementTree import Element, SubElement, ElementTree
+from typing import Optional, List, Iterable, Sequence
+from xml.etree.ElementTree import Element
+
+from tool import xml_backend
+
+
+_empty = ()  # type: Sequence[str]
+
+
+def _validate_rating(rating: Optional[float]):
+    if rating is not None and not 0 <= rating <= 10:
+        raise ValueError("Rating should be >= 0 and <= 10.")
 
 
 class Episode:
+    __slots__ = ("name", "season", "episode", "title", "aired", "mpaa", "plot", "directors", "writers", "producers",
+                 "guests", "rating")
+
     def __init__(self, name: str, season: int, episode: int, title: Optional[str] = None,
                  aired: Optional[datetime] = None, mpaa: Optional[str] = None, plot: Optional[str] = None,
-                 directors: Optional[List[str]] = None, writers: Optional[List[str]] = None,
-                 producers: Optional[List[str]] = None, guests: Optional[List[str]] = None,
+                 directors: Optional[Sequence[str]] = None, writers: Optional[Sequence[str]] = None,
+                 producers: Optional[Sequence[str]] = None, guests: Optional[Sequence[str]] = None,
                  rating: Optional[float] = None):
         if season < 0:
             raise ValueError("Season number cannot be less than 0.")
         if episode < 1:
             raise ValueError("Episode number cannot be less than 1.")
-        self.name = name
+        _validate_rating(rating)
+        self.name = name  # type: str
         self.season = season  # type: int
         self.episode = episode  # type: int
         self.title = title  # type: Optional[str]
         self.aired = aired  # type: Optional[datetime]
-        self.mpaa = mpaa  # type: Optional[datetime]
+        self.mpaa = mpaa  # type: Optional[str]
         self.plot = plot  # type: Optional[str]
-        if directors is None:
-            directors = []
-        self.directors = directors  # type: List[str]
-        if writers is None:
-            writers = []
-        self.writers = writers  # type: List[str]
-        if producers is None:
-            producers = []
-        self.producers = producers  # type: List[str]
-        if guests is None:
-            guests = []
-        self.guests = guests  # type: List[str]
-        if rating is not None and (0 < rating or rating > 10):
-            raise ValueError("Rating should be >= 0 and <= 10.")
+        self.directors = directors or _empty  # type: Sequence[str]
+        self.writers = writers or _empty  # type: Sequence[str]
+        self.producers = producers or _empty  # type: Sequence[str]
+        self.guests = guests or _empty  # type: Sequence[str]
+        self.rating = rating  # type: Optional[float]
+
+
+class Actor:
+    __slots__ = ("name", "role", "thumb")
+
+    def __init__(self, name: str, role: Optional[str] = None, thumb: Optional[str] = None):
+        self.name = name  # type: str
+        self.role = role  # type: Optional[str]
+        self.thumb = thumb  # type: Optional[str]
+
+
+class TvShow:
+    __slots__ = ("title", "aired", "mpaa", "plot", "studio", "genres", "actors", "rating")
+
+    def __init__(self, title: str, aired: Optional[datetime] = None, mpaa: Optional[str] = None,
+                 plot: Optional[str] = None, studio: Optional[str] = None, genres: Optional[Sequence[str]] = None,
+                 actors: Optional[Sequence[Actor]] = None, rating: Optional[float] = None):
+        _validate_rating(rating)
+        self.title = title  # type: str
+        self.aired = aired  # type: Optional[datetime]
+        self.mpaa = mpaa  # type: Optional[str]
+        self.plot = plot  # type: Optional[str]
+        self.studio = studio  # type: Optional[str]
+        self.genres = genres or _empty  # type: Sequence[str]
+        self.actors = actors or _empty  # type: Sequence[Actor]
+        self.rating = rating  # type: Optional[float]
+
+
+class Movie:
+    __slots__ = ("title", "aired", "mpaa", "plot", "studio", "genres", "directors", "writers", "actors", "rating")
+
+    def __init__(self, title: str, aired: Optional[datetime] = None, mpaa: Optional[str] = None,
+                 plot: Optional[str] = None, studio: Optional[str] = None, genres: Optional[Sequence[str]] = None,
+                 directors: Optional[Sequence[str]] = None, writers: Optional[Sequence[str]] = None,
+                 actors: Optional[Sequence[Actor]] = None, rating: Optional[float] = None):
+        _validate_rating(rating)
+        self.title = title  # type: str
+        self.aired = aired  # type: Optional[datetime]
+        self.mpaa = mpaa  # type: Optional[str]
+        self.plot = plot  # type: Optional[str]
+        self.studio = studio  # type: Optional[str]
+        self.genres = genres or _empty  # type: Sequence[str]
+        self.directors = directors or _empty  # type: Sequence[str]
+        self.writers = writers or _empty  # type: Sequence[str]
+        self.actors = actors or _empty  # type: Sequence[Actor]
         self.rating = rating  # type: Optional[float]
 
 
 class XmlSerializer:
+    _episode_tags = ["title", "episode", "aired", "plot"]
+
     def __init__(self, serialize_empty: bool = False):
         self._serialize_empty = serialize_empty  # type: bool
 
     def serialize(self, data: Episode, folder: str = "", encoding: str = "utf-8", output: Optional[str] = None,
                   short_empty_elements: bool = False):
         root = self._serialize_episode(data)  # type: Element
-        tree = ElementTree(element=root)  # type: ElementTree
         if output is None:
-            file_name = "{0} - s{1:02d}e{2:02d}.xml".format(data.name, data.season, data.episode)
-            output = join(folder, file_name)
-        tree.write(output, encoding=encoding, short_empty_elements=short_empty_elements)
+            output = self._output_path(data, folder)
+        xml_backend.write(root, output, encoding=encoding, short_empty_elements=short_empty_elements)
+
+    def serialize_many(self, episodes: Iterable[Episode], folder: str = "", encoding: str = "utf-8",
+                       short_empty_elements: bool = False) -> int:
+        count = 0
+        root = None  # type: Optional[Element]
+        elements = []  # type: List[Optional[Element]]
+        template_key = None
+        for episode in episodes:
+            values = self._episode_values(episode)
+            key = (episode.mpaa, tuple(episode.directors), tuple(episode.writers), tuple(episode.producers),
+                   tuple(episode.guests), episode.rating, tuple(value is None for value in values))
+            if key != template_key:
+                root = self._serialize_episode(episode)
+                elements = [root.find(tag) for tag in self._episode_tags]
+                template_key = key
+            else:
+                for element, value in zip(elements, values):
+                    if element is not None:
+                        element.text = value if value is not None else ""
+            xml_backend.write(root, self._output_path(episode, folder), encoding=encoding,
+                              short_empty_elements=short_empty_elements)
+            count += 1
+        return count
+
+    @staticmethod
+    def _episode_values(episode: Episode) -> List[Optional[str]]:
+        return [str(value) if value is not None else None for value in
+                [episode.title, episode.episode, episode.aired.date() if episode.aired is not None else None,
+                 episode.plot]]
+
+    @staticmethod
+    def _output_path(episode: Episode, folder: str) -> str:
+        file_name = "{0} - s{1:02d}e{2:02d}.xml".format(episode.name, episode.season, episode.episode)
+        return join(folder, file_name)
 
     def _serialize_episode(self, episode: Episode) -> Element:
-        root = Element("episodedetails")
+        root = xml_backend.element("episodedetails")
         self._insert_sub_element(root, "title", episode.title)
         self._insert_sub_element(root, "episode", episode.episode)
         self._insert_sub_element(root, "aired", episode.aired.date() if episode.aired is not None else None)
@@ -67,9 +151,9 @@ class XmlSerializer:
 
     def _insert_sub_element(self, parent: Element, tag: str, content):
         if content is not None:
-            SubElement(parent, tag).text = str(content)
+            xml_backend.sub_element(parent, tag).text = str(content)
         elif self._serialize_empty:
-            SubElement(parent, tag).text = ""
+            xml_backend.sub_element(parent, tag).text = ""
 
     def _insert_list_sub_element(self, parent: Element, tag: str, content):
         for item in content:
@@ -0,0 +1,41 @@
+import csv
+import json
+from os.path import splitext
+from typing import Dict, Iterable, List, Optional, Tuple
+
+_separator = "|"
+
+
+class ActorReport:
+    def __init__(self, sample: int = 10):
+        self._sample = sample  # type: int
+        self._actors = {}  # type: Dict[Tuple[str, Optional[str]], list]
+
+    def add(self, file: str, names: Iterable[Optional[str]], status: str = "undefined"):
+        for name in names:
+            actor = self._actors.get((status, name))
+            if actor is None:
+                actor = self._actors[(status, name)] = [0, []]
+            actor[0] += 1
+            files = actor[1]  # type: List[str]
+            if len(files) < self._sample and (not files or files[-1] != file):
+                files.append(file)
+
+    def actors(self, status: Optional[str] = None) -> List[Tuple[Optional[str], str, int, List[str]]]:
+        actors = [(name, actor_status, count, files) for (actor_status, name), (count, files) in self._actors.items()
+                  if status is None or actor_status == status]
+        actors.sort(key=lambda actor: (-actor[2], actor[0] or ""))
+        return actors
+
+    def write(self, path: str):
+        actors = self.actors()
+        if splitext(path)[1].lower() == ".csv":
+            with open(path, mode="w", encoding="utf-8", newline="") as file:
+                writer = csv.writer(file)
+                writer.writerow(["name", "status", "count", "files"])
+                for name, status, count, files in actors:
+                    writer.writerow([name, status, count, _separator.join(files)])
+        else:
+            with open(path, mode="w", encoding="utf-8") as file:
+                json.dump([{"name": name, "status": status, "count": count, "files": files}
+                           for name, status, count, files in actors], file, indent=4, ensure_ascii=False)
@@ -0,0 +1,10 @@
+from os.path import isfile
+
+from tool.thumb import process_files
+
+
+def _run(args):
+    if "thumb" in args.transforms and not isfile(args.cast):
+        print(f"{args.cast} is not a file")
+        return
+    process_files(args, args.transforms)
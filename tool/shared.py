@@ -0,0 +1,60 @@
+from contextlib import nullcontext, contextmanager
+from os.path import abspath, join
+from threading import Lock, Condition, get_ident
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+
+
+class SharedCache:
+    def __init__(self):
+        self.enabled = False  # type: bool
+        self._items = {}  # type: Dict[Hashable, Any]
+        self._lock = Lock()
+        self._paths = []  # type: List[Tuple[str, int]]
+        self._paths_changed = Condition(self._lock)
+
+    def get(self, key: Hashable, factory: Callable[[], Any], replace: bool = False):
+        if not self.enabled:
+            return factory()
+        with self._lock:
+            if replace or key not in self._items:
+                self._items[key] = factory()
+            return self._items[key]
+
+    def lock_path(self, path: str):
+        # Jobs on nested directories rewrite the same files, a path waits while an ancestor or descendant is in use.
+        if not self.enabled:
+            return nullcontext()
+        return self._hold_path(abspath(path))
+
+    @contextmanager
+    def _hold_path(self, path: str):
+        owner = get_ident()
+        with self._paths_changed:
+            while any(thread != owner and _overlaps(path, held) for held, thread in self._paths):
+                self._paths_changed.wait()
+            self._paths.append((path, owner))
+        try:
+            yield
+        finally:
+            with self._paths_changed:
+                self._paths.remove((path, owner))
+                self._paths_changed.notify_all()
+
+    def close(self, item):
+        if not self.enabled:
+            item.close()
+
+    def clear(self):
+        with self._lock:
+            items = list(self._items.values())
+            self._items.clear()
+        for item in items:
+            if hasattr(item, "close"):
+                item.close()
+
+
+def _overlaps(path: str, other: str) -> bool:
+    return path == other or path.startswith(join(other, "")) or other.startswith(join(path, ""))
+
+
+shared = SharedCache()
@@ -0,0 +1,110 @@
+import sys
+from collections import defaultdict
+from contextlib import nullcontext
+from time import perf_counter
+from typing import Dict, Iterable, Iterator, Optional, Tuple, TypeVar
+
+_T = TypeVar("_T")
+_phases = ["scan", "read", "parse", "transform", "serialize", "write"]
+_disabled = nullcontext()
+
+
+class _Phase:
+    __slots__ = ("_stats", "_name", "_start")
+
+    def __init__(self, stats: "Stats", name: str):
+        self._stats = stats  # type: Stats
+        self._name = name  # type: str
+        self._start = 0.0  # type: float
+
+    def __enter__(self):
+        self._start = perf_counter()
+
+    def __exit__(self, *exc_info):
+        self._stats.add_time(self._name, perf_counter() - self._start)
+
+
+class Stats:
+    def __init__(self):
+        self.enabled = False  # type: bool
+        self._times = defaultdict(float)  # type: Dict[str, float]
+        self._calls = defaultdict(int)  # type: Dict[str, int]
+        self._counters = defaultdict(int)  # type: Dict[str, int]
+
+    def phase(self, name: str):
+        # Disabled runs share one no-op context manager, so a phase costs an attribute check and a call.
+        if not self.enabled:
+            return _disabled
+        return _Phase(self, name)
+
+    def add_time(self, name: str, elapsed: float):
+        self._times[name] += elapsed
+        self._calls[name] += 1
+
+    def count(self, name: str, value: int = 1):
+        if self.enabled:
+            self._counters[name] += value
+
+    def iterate(self, name: str, iterable: Iterable[_T], counter: Optional[str] = None) -> Iterator[_T]:
+        if not self.enabled:
+            return iter(iterable)
+        return self._iterate(name, iter(iterable), counter)
+
+    def _iterate(self, name: str, iterator: Iterator[_T], counter: Optional[str]) -> Iterator[_T]:
+        # Only the time spent producing items is charged to the phase, not the caller's work between them.
+        while True:
+            start = perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add_time(name, perf_counter() - start)
+                return
+            self.add_time(name, perf_counter() - start)
+            if counter is not None:
+                self._counters[counter] += 1
+            yield item
+
+    def pop(self) -> Optional[Tuple[dict, dict, dict]]:
+        if not self.enabled:
+            return None
+        snapshot = dict(self._times), dict(self._calls), dict(self._counters)
+        self.clear()
+        return snapshot
+
+    def clear(self):
+        self._times.clear()
+        self._calls.clear()
+        self._counters.clear()
+
+    def merge(self, snapshot: Optional[Tuple[dict, dict, dict]]):
+        if snapshot is None:
+            return
+        times, calls, counters = snapshot
+        for name, elapsed in times.items():
+            self._times[name] += elapsed
+        for name, value in calls.items():
+            self._calls[name] += value
+        for name, value in counters.items():
+            self._counters[name] += value
+
+    def merge_results(self, results: Iterable[Tuple[_T, Optional[Tuple[dict, dict, dict]]]]) -> Iterator[_T]:
+        for result, snapshot in results:
+            self.merge(snapshot)
+            yield result
+
+    def report(self, file=sys.stderr):
+        names = [name for name in _phases if name in self._times] + \
+                sorted(name for name in self._times.keys() if name not in _phases)
+        for name in names:
+            print(f"{name:<16}{self._times[name]:>10.3f}s{self._calls[name]:>10} call(s)", file=file)
+        for name, value in sorted(self._counters.items()):
+            print(f"{name:<16}{value:>10}", file=file)
+
+
+def enable(enabled: bool = True):
+    # Forked workers inherit the parent's numbers, which would be counted twice when merged back.
+    stats.enabled = enabled
+    stats.clear()
+
+
+stats = Stats()
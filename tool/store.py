@@ -0,0 +1,107 @@
+import json
+import sqlite3
+from os import replace, remove
+from os.path import isfile, splitext, exists
+from shutil import copymode
+from typing import Dict, Optional, Iterable, Iterator, Tuple
+
+from tool import temp_name
+
+_sqlite_exts = [".db", ".sqlite", ".sqlite3"]
+
+
+class JsonCastStore:
+    def __init__(self, path: str):
+        self.path = path  # type: str
+        self._casts = None  # type: Optional[Dict[str, str]]
+
+    def _load(self) -> Dict[str, str]:
+        if self._casts is None:
+            if isfile(self.path):
+                with open(self.path, mode="r", encoding="utf-8") as file:
+                    self._casts = json.load(file)
+            else:
+                self._casts = {}
+        return self._casts
+
+    def get(self, name: str) -> Optional[str]:
+        return self._load().get(name)
+
+    def items(self) -> Iterator[Tuple[str, str]]:
+        return iter(self._load().items())
+
+    def upsert(self, items: Iterable[Tuple[str, str]]):
+        casts = self._load()
+        casts.update(items)
+        self._write(casts)
+
+    def replace(self, casts: Dict[str, str]) -> bool:
+        self._casts = casts
+        return self._write(casts)
+
+    def _write(self, casts: Dict[str, str]) -> bool:
+        json_str = json.dumps(casts, indent=4, sort_keys=True, ensure_ascii=False)
+        if isfile(self.path):
+            with open(self.path, encoding="utf-8", mode="r") as file:
+                if file.read() == json_str:
+                    return False
+        # Written aside and swapped in, so readers like watch never see a half-written file.
+        temp_path = temp_name(self.path)
+        try:
+            with open(temp_path, encoding="utf-8", mode="w") as file:
+                file.write(json_str)
+            if isfile(self.path):
+                copymode(self.path, temp_path)
+            replace(temp_path, self.path)
+        except BaseException:
+            if exists(temp_path):
+                remove(temp_path)
+            raise
+        return True
+
+    def close(self):
+        pass
+
+
+class SqliteCastStore:
+    def __init__(self, path: str, check_same_thread: bool = True):
+        self.path = path  # type: str
+        self._connection = sqlite3.connect(path, check_same_thread=check_same_thread)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS casts (name TEXT PRIMARY KEY, thumb TEXT NOT NULL) "
+                                 "WITHOUT ROWID")
+        self._cache = {}  # type: Dict[str, Optional[str]]
+
+    def get(self, name: str) -> Optional[str]:
+        if name not in self._cache:
+            row = self._connection.execute("SELECT thumb FROM casts WHERE name = ?", (name,)).fetchone()
+            self._cache[name] = row[0] if row is not None else None
+        return self._cache[name]
+
+    def items(self) -> Iterator[Tuple[str, str]]:
+        return self._connection.execute("SELECT name, thumb FROM casts ORDER BY name")
+
+    def upsert(self, items: Iterable[Tuple[str, str]]):
+        with self._connection:
+            self._connection.executemany("INSERT OR REPLACE INTO casts (name, thumb) VALUES (?, ?)", items)
+        self._cache.clear()
+
+    def replace(self, casts: Dict[str, str]) -> bool:
+        current = dict(self.items())
+        removed = [(name,) for name in current.keys() - casts.keys()]
+        changed = [(name, thumb) for name, thumb in casts.items() if current.get(name) != thumb]
+        if not removed and not changed:
+            return False
+        with self._connection:
+            self._connection.executemany("DELETE FROM casts WHERE name = ?", removed)
+            self._connection.executemany("INSERT OR REPLACE INTO casts (name, thumb) VALUES (?, ?)", changed)
+        self._cache.clear()
+        return True
+
+    def close(self):
+        self._connection.close()
+
+
+def open_cast_store(path: str, check_same_thread: bool = True):
+    if splitext(path)[1].lower() in _sqlite_exts:
+        return SqliteCastStore(path, check_same_thread)
+    return JsonCastStore(path)
@@ -1,57 +1,103 @@
-import json
-# noinspection PyProtectedMember
-from xml.etree.ElementTree import Element, SubElement, ElementTree
+from concurrent.futures import ProcessPoolExecutor
+from os import stat
+from os.path import abspath, join
+from typing import List, Optional, Tuple
 
-from tool import valid_file, find_files
-from tool.argument import Argument, add_arguments, ask_inputs
+from tool import find_files, xml_backend
+from tool.index import ScanIndex
+from tool.match import CastMatcher
+from tool.report import ActorReport
+from tool.shared import shared
+from tool.stats import stats, enable
+from tool.store import open_cast_store
+from tool.transform import Result, Pipeline, create_pipeline
 
-_arguments = [
-    Argument("cast", abbr="c", type=valid_file, default="cast.json", meta="<cast JSON>",
-             help="Cast JSON used for update (default: cast.json)"),
-    Argument("day", abbr="d", type=int, default=1, meta="<last modify>",
-             help="Day difference of xml to be updated. (default: %(default)s)")
-]
+_worker_pipeline = None  # type: Optional[Pipeline]
 
 
-def create_subparser(subparsers):
-    command = "thumb"
-    parser = subparsers.add_parser(command, help="Update <thumb> in xml file(s).")
-    add_arguments(parser, _arguments)
-    return command, _thumb
+def _thumb(args):
+    process_files(args, ["thumb"])
 
 
-def _thumb(args):
-    if args is None:
-        args = ask_inputs(_arguments)
-    with open(args.cast, mode="r", encoding="utf-8") as casts_file:
-        casts = json.load(casts_file)
-    undefined = set()
+def process_files(args, transforms: List[str]):
+    # Batch jobs on the same or nested directories would rewrite the same files, they take turns.
+    with shared.lock_path(args.input):
+        _process_files(args, transforms)
+
+
+def _process_files(args, transforms: List[str]):
+    report = ActorReport(args.sample)
     day_diff = args.day
     if day_diff < 0:
         day_diff = None
-    for file in find_files(".", "*.xml", day_diff):
-        with open(file, mode="r", encoding="utf-8") as xml:
-            first_line = xml.readline()
-            if "tvshow" not in first_line and "movie" not in first_line:
-                continue
-        tree = ElementTree(file=file)
-        root = tree.getroot()  # type: Element
-        if root.tag not in ["tvshow", "movie"]:
-            continue
-        for element in tree.iter():  # type: Element
-            if element.text is not None and element.text.isspace():
-                element.text = None
-            element.tail = None
-        for actor in tree.findall("actor"):  # type: Element
-            name_element = actor.find("name")  # type: Element
-            if name_element.text in casts:
-                thumb_element = actor.find("thumb")  # type: Element
-                if thumb_element is None:
-                    thumb_element = SubElement(actor, "thumb")
-                thumb_element.text = casts[name_element.text]
-            else:
-                undefined.add(name_element.text)
-
-        tree.write(file, encoding="utf-8", short_empty_elements=False)
-    for actor in undefined:
+    index = None  # type: Optional[ScanIndex]
+    if args.index:
+        index_path = join(args.input, args.index)
+        index = shared.get(("index", abspath(index_path)), lambda: ScanIndex(index_path, rebuild=args.rebuild_index),
+                           replace=args.rebuild_index)
+    pipeline = create_pipeline(transforms)
+    files = [file for file in find_files(args.input, "*.xml", day_diff, index=index)
+             if index is None or index.get_tag(file) is None or pipeline.accepts(index.get_tag(file))]
+    if args.jobs > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs, initializer=_init_worker,
+                                 initargs=(transforms, args.cast, args.normalized, args.distance,
+                                           stats.enabled, xml_backend.name == "lxml")) as executor:
+            results = stats.merge_results(executor.map(_process_worker, files, chunksize=16))
+            modified = _collect(files, results, report, index)
+    else:
+        store, pipeline = _open_pipeline(transforms, args.cast, args.normalized, args.distance)
+        modified = _collect(files, (pipeline.process(file) for file in files), report, index)
+        if store is not None:
+            shared.close(store)
+    if index is not None:
+        index.save()
+    for actor, _, _, _ in report.actors("undefined"):
         print(actor)
+    for actor, _, _, _ in report.actors("ambiguous"):
+        print(f"Ambiguous: {actor}")
+    if args.report is not None:
+        report.write(args.report)
+    print(f"Scanned: {len(files)}, Modified: {modified}, Skipped: {len(files) - modified}")
+
+
+def _collect(files, results, report: ActorReport, index: Optional[ScanIndex]) -> int:
+    modified = 0
+    for file, result in zip(files, results):
+        report.add(file, result.undefined)
+        report.add(file, result.ambiguous, "ambiguous")
+        if result.modified:
+            modified += 1
+        if index is not None:
+            index.set_tag(file, result.tag)
+    return modified
+
+
+def _open_pipeline(transforms: List[str], cast_path: str, normalized: bool, distance: int) -> Tuple[object, Pipeline]:
+    # The cast store is only opened when a stage needs it.
+    if "thumb" not in transforms:
+        return None, create_pipeline(transforms)
+    # Batch jobs reuse the parsed table and the matcher keys until the file changes.
+    file_stat = stat(cast_path)
+    key = (abspath(cast_path), file_stat.st_mtime_ns, file_stat.st_size)
+    store = shared.get(("cast store", *key),
+                       lambda: open_cast_store(cast_path, check_same_thread=not shared.enabled))
+    casts = shared.get(("casts", normalized, distance, *key), lambda: CastMatcher(store, normalized, distance))
+    return store, create_pipeline(transforms, casts)
+
+
+def _init_worker(transforms: List[str], cast_path: str, normalized: bool, distance: int, stats_enabled: bool,
+                 use_lxml: bool):
+    global _worker_pipeline
+    # Forked from a batch, the parent's shared items are not ours to use.
+    shared.enabled = False
+    _, _worker_pipeline = _open_pipeline(transforms, cast_path, normalized, distance)
+    enable(stats_enabled)
+    xml_backend.use_lxml(use_lxml)
+
+
+def _process_worker(file: str):
+    return _worker_pipeline.process(file), stats.pop()
+
+
+def update_file(file: str, casts: CastMatcher) -> Result:
+    return create_pipeline(["thumb"], casts).process(file)
@@ -0,0 +1,131 @@
+from typing import List, Optional, NamedTuple
+# noinspection PyProtectedMember
+from xml.etree.ElementTree import Element, ElementTree
+
+from tool import sniff_root_tag, write_xml_atomic, xml_backend
+from tool.match import CastMatcher
+from tool.normalize import normal_text
+from tool.stats import stats
+
+
+class Result(NamedTuple):
+    tag: Optional[str]
+    modified: bool
+    undefined: List[str]
+    ambiguous: List[str]
+
+
+class ThumbTransform:
+    name = "thumb"
+    tags = ["tvshow", "movie"]
+
+    def __init__(self, casts: CastMatcher):
+        self._casts = casts  # type: CastMatcher
+
+    def apply(self, tree: ElementTree, result: Result) -> bool:
+        modified = False
+        for actor in tree.findall("actor"):  # type: Element
+            name_element = actor.find("name")  # type: Element
+            thumb, is_ambiguous = self._casts.match(name_element.text)
+            if thumb is not None:
+                thumb_element = actor.find("thumb")  # type: Element
+                if thumb_element is None:
+                    thumb_element = xml_backend.sub_element(actor, "thumb")
+                elif thumb_element.text == thumb:
+                    continue
+                thumb_element.text = thumb
+                modified = True
+            elif is_ambiguous:
+                result.ambiguous.append(name_element.text)
+            else:
+                result.undefined.append(name_element.text)
+        return modified
+
+
+class NormalizeTransform:
+    name = "normalize"
+    tags = None
+
+    # Works on parsed character data, so unlike normal_file it never has to protect markup from NFKC,
+    # normal_text gives the same characters normal_file leaves in the file.
+    def apply(self, tree: ElementTree, result: Result) -> bool:
+        modified = False
+        for element in tree.iter():  # type: Element
+            if element.text is not None:
+                text = normal_text(element.text)
+                modified = modified or text != element.text
+                element.text = text
+            if element.tail is not None:
+                tail = normal_text(element.tail)
+                modified = modified or tail != element.tail
+                element.tail = tail
+            for key, value in element.items():
+                text = normal_text(value)
+                if text != value:
+                    element.set(key, text)
+                    modified = True
+        return modified
+
+
+class StripTransform:
+    name = "strip"
+    tags = None
+
+    def apply(self, tree: ElementTree, result: Result) -> bool:
+        modified = False
+        for element in tree.iter():  # type: Element
+            if element.text is not None and not element.text.isspace():
+                text = element.text.strip()
+                modified = modified or text != element.text
+                element.text = text
+        return modified
+
+
+transforms = [ThumbTransform, NormalizeTransform, StripTransform]
+
+
+class Pipeline:
+    def __init__(self, stages: list):
+        self._stages = stages  # type: list
+
+    def accepts(self, tag: Optional[str]) -> bool:
+        return tag is not None and any(stage.tags is None or tag in stage.tags for stage in self._stages)
+
+    def process(self, file: str) -> Result:
+        result = Result(None, False, [], [])
+        with stats.phase("parse"), open(file, mode="rb") as xml:
+            tag = sniff_root_tag(xml)
+            if not self.accepts(tag):
+                return result._replace(tag=tag)
+            xml.seek(0)
+            tree = xml_backend.parse(xml)
+        stats.count("files parsed")
+        result = result._replace(tag=tag)
+        modified = False
+        with stats.phase("transform"):
+            for stage in self._stages:
+                if stage.tags is None or tag in stage.tags:
+                    modified = stage.apply(tree, result) or modified
+            if modified:
+                _strip_layout(tree)
+        if modified:
+            write_xml_atomic(tree, file, encoding="utf-8", short_empty_elements=False)
+        return result._replace(modified=modified)
+
+
+def create_pipeline(names: List[str], casts: Optional[CastMatcher] = None) -> Pipeline:
+    stages = []
+    for name in names:
+        transform = next((transform for transform in transforms if transform.name == name), None)
+        if transform is None:
+            raise ValueError(f"Unknown transform: {name}")
+        stages.append(transform(casts) if transform is ThumbTransform else transform())
+    return Pipeline(stages)
+
+
+def _strip_layout(tree: ElementTree):
+    # The writer indents on its own, the old layout whitespace would be doubled.
+    for element in tree.iter():  # type: Element
+        if element.text is not None and element.text.isspace():
+            element.text = None
+        element.tail = None
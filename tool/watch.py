@@ -0,0 +1,191 @@
+import sqlite3
+from os import scandir, stat
+from queue import Queue, Empty
+from time import monotonic, sleep
+from typing import Dict, Tuple, Set, Optional
+
+from tool import any_match
+from tool.match import CastMatcher
+from tool.normalize import normal_file
+from tool.store import open_cast_store
+from tool.thumb import update_file
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+_patterns = ["*.xml"]
+
+_FileState = Tuple[float, int]
+
+
+def _watch(args):
+    casts = _CastCache(args.cast, args.normalized, args.distance)
+    source = _EventSource(".") if Observer is not None else _PollingSource(".", args.interval)
+    pending = {}  # type: Dict[str, float]
+    print(f"Watching for changes ({type(source).__name__})...")
+    try:
+        while True:
+            # A deadline may have passed while the previous batch was processed.
+            timeout = max(0.0, min(pending.values()) - monotonic()) if pending else None
+            for path in source.changes(timeout):
+                # Bursty writers keep pushing the deadline back; the file is processed once they are quiet.
+                pending[path] = monotonic() + args.debounce
+            now = monotonic()
+            for path in [path for path, deadline in pending.items() if deadline <= now]:
+                del pending[path]
+                _process(path, args, casts.get(), source)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        source.close()
+        casts.close()
+
+
+def _process(path: str, args, casts: CastMatcher, source):
+    try:
+        if args.normalize:
+            normal_file(path)
+        result = update_file(path, casts)
+    except (OSError, SyntaxError, ValueError) as e:
+        # ParseError is a SyntaxError and UnicodeDecodeError a ValueError; half-written files are picked up again on
+        # their next change.
+        print(f"{path}: {e}")
+        return
+    source.ignore(path)
+    if result.modified:
+        print(f"Updated: {path}")
+    for actor in sorted(set(result.undefined), key=str):
+        print(f"{path}: {actor}")
+
+
+def _file_state(path: str) -> Optional[_FileState]:
+    try:
+        file_stat = stat(path)
+    except OSError:
+        return None
+    return file_stat.st_mtime, file_stat.st_size
+
+
+class _CastCache:
+    def __init__(self, path: str, normalized: bool, distance: int):
+        self._path = path  # type: str
+        self._normalized = normalized  # type: bool
+        self._distance = distance  # type: int
+        self._state = None  # type: Optional[_FileState]
+        self._store = None
+        self._matcher = None  # type: Optional[CastMatcher]
+
+    def get(self) -> CastMatcher:
+        state = _file_state(self._path)
+        if self._matcher is None or state != self._state:
+            store = open_cast_store(self._path)
+            try:
+                # JSON stores load lazily, a half-written file has to fail here and not in the middle of a file.
+                store.get("")
+            except (OSError, ValueError, sqlite3.Error) as e:
+                store.close()
+                if self._matcher is None:
+                    raise
+                # The state is kept, so the next change of the cast file loads it again.
+                print(f"{self._path}: {e}")
+                return self._matcher
+            self.close()
+            self._store = store
+            self._matcher = CastMatcher(self._store, self._normalized, self._distance)
+            self._state = state
+        return self._matcher
+
+    def close(self):
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+
+
+class _PollingSource:
+    def __init__(self, directory: str, interval: float):
+        self._directory = directory  # type: str
+        self._interval = interval  # type: float
+        self._files = self._scan()  # type: Dict[str, _FileState]
+
+    def changes(self, timeout: Optional[float]) -> Set[str]:
+        sleep(self._interval if timeout is None else max(0.0, min(timeout, self._interval)))
+        files = self._scan()
+        changed = {path for path, state in files.items() if self._files.get(path) != state}
+        self._files = files
+        return changed
+
+    def ignore(self, path: str):
+        state = _file_state(path)
+        if state is not None:
+            self._files[path] = state
+
+    def close(self):
+        pass
+
+    def _scan(self) -> Dict[str, _FileState]:
+        files = {}  # type: Dict[str, _FileState]
+        stack = [self._directory]
+        while stack:
+            try:
+                entries = list(scandir(stack.pop()))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if not entry.name.startswith("."):
+                        stack.append(entry.path)
+                elif any_match(entry.name, _patterns):
+                    try:
+                        entry_stat = entry.stat()
+                    except OSError:
+                        continue
+                    files[entry.path] = (entry_stat.st_mtime, entry_stat.st_size)
+        return files
+
+
+class _EventHandler(FileSystemEventHandler):
+    def __init__(self, queue: Queue):
+        super().__init__()
+        self._queue = queue  # type: Queue
+
+    def on_any_event(self, event):
+        if event.is_directory or event.event_type not in ("created", "modified", "moved"):
+            return
+        # Every event has a dest_path, it is only set for moves.
+        path = event.dest_path if event.event_type == "moved" else event.src_path
+        if any_match(path, _patterns):
+            self._queue.put(path)
+
+
+class _EventSource:
+    def __init__(self, directory: str):
+        self._queue = Queue()  # type: Queue
+        self._ignored = {}  # type: Dict[str, _FileState]
+        self._observer = Observer()
+        self._observer.schedule(_EventHandler(self._queue), directory, recursive=True)
+        self._observer.start()
+
+    def changes(self, timeout: Optional[float]) -> Set[str]:
+        changed = set()  # type: Set[str]
+        try:
+            changed.add(self._queue.get(timeout=timeout))
+            while True:
+                changed.add(self._queue.get_nowait())
+        except Empty:
+            pass
+        # Drop the events caused by our own writes.
+        return {path for path in changed
+                if path not in self._ignored or self._ignored.pop(path) != _file_state(path)}
+
+    def ignore(self, path: str):
+        state = _file_state(path)
+        if state is not None:
+            self._ignored[path] = state
+
+    def close(self):
+        self._observer.stop()
+        self._observer.join()
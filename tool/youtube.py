@@ -1,35 +1,18 @@
 import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from os import listdir, rename, makedirs
-from os.path import isfile, join
-from typing import Optional, Any, Dict
+from functools import partial
+from os import rename, makedirs, replace
+from os.path import join, isfile
+from threading import Lock, local
+from typing import Optional, Any, Dict, List, Tuple, Callable, Set
 
 from youtube_dl import YoutubeDL
+from youtube_dl.postprocessor.common import PostProcessor
 
-from tool import convert_size, valid_dir
-from tool.argument import Argument, ask_inputs, add_arguments
+from tool import convert_size
 from tool.plex import Episode, XmlSerializer
 
-_arguments = [
-    Argument("yid", type=str, meta="<youtube playlist id>"),
-    Argument("prefix", abbr="p", type=str, default=None, meta="<prefix>", help="Output file name prefix"),
-    Argument("output", abbr="o", type=valid_dir, default="output", meta="<output directory>",
-             help="Output directory of the xml(s) (default: current)"),
-    Argument("season", abbr="s", type=int, default=1, meta="<season number>",
-             help="Season number of the xml(s) (default: %(default)s)"),
-    Argument("mpaa", abbr="m", type=str, default=None, allow_default_none=True, meta="<mpaa>",
-             help="Common mpaa of all the generate xml(s)"),
-    Argument("list", abbr="t", type=bool, default=False, meta="<list>",
-             help="Is youtube playlist")
-]
-
-
-def create_subparser(subparsers):
-    command = "youtube"
-    parser = subparsers.add_parser(command, help="Generate xml file(s).")
-    add_arguments(parser, _arguments)
-    return command, _download_youtube_playlist
-
 
 # noinspection PyMethodMayBeStatic
 class _Logger(object):
@@ -57,6 +40,85 @@ def _hook(d):
         print(message)
 
 
+class _Progress:
+    def __init__(self, total: int):
+        self._total = total  # type: int
+        self._finished = 0  # type: int
+        self._downloading = {}  # type: Dict[str, Dict[str, Any]]
+        self._lock = Lock()
+
+    def hook(self, d):
+        with self._lock:
+            if d["status"] == "downloading":
+                self._downloading[d["filename"]] = d
+            else:
+                self._downloading.pop(d["filename"], None)
+            self._print()
+
+    def finish(self):
+        with self._lock:
+            self._finished += 1
+            self._print()
+
+    def _print(self):
+        downloading = self._downloading.values()
+        message = f"Finished: {self._finished}/{self._total} Downloading: {len(downloading)}"
+        etas = [d["eta"] for d in downloading if d.get("eta") is not None]
+        if etas:
+            m, s = divmod(max(etas), 60)
+            h, m = divmod(m, 60)
+            message += f" ETA: {'%d:%02d:%02d' % (h, m, s)}"
+        speed = sum(d.get("speed") or 0 for d in downloading)
+        message += f" {convert_size(speed)}/s"
+        print(message)
+
+
+class _Journal:
+    file_name = ".youtube_journal.json"
+
+    def __init__(self, folder: str):
+        self._path = join(folder, self.file_name)  # type: str
+        self._lock = Lock()
+        self._videos = {}  # type: Dict[str, Dict[str, Any]]
+        if isfile(self._path):
+            with open(self._path, mode="r", encoding="utf-8") as file:
+                self._videos = json.load(file)
+
+    def completed(self) -> Set[str]:
+        return {vid for vid, video in self._videos.items() if video["state"] == "completed"}
+
+    def assign(self, vid: str, index: int) -> int:
+        with self._lock:
+            if vid in self._videos:
+                return self._videos[vid]["episode"]
+            used = {video["episode"] for video in self._videos.values()}
+            episode = index if index not in used else max(used) + 1
+            self._videos[vid] = {"episode": episode, "files": [], "state": "downloaded"}
+            self._save()
+            return episode
+
+    def complete(self, vid: str, files: List[str]):
+        with self._lock:
+            self._videos[vid].update(files=files, state="completed")
+            self._save()
+
+    def _save(self):
+        temp_path = self._path + ".tmp"
+        with open(temp_path, mode="w", encoding="utf-8") as file:
+            json.dump(self._videos, file, indent=4, sort_keys=True, ensure_ascii=False)
+        replace(temp_path, self._path)
+
+
+class _FinishedPostProcessor(PostProcessor):
+    def __init__(self, on_finished: Callable[[Dict[str, Any]], None], downloader=None):
+        super().__init__(downloader)
+        self._on_finished = on_finished  # type: Callable[[Dict[str, Any]], None]
+
+    def run(self, information):
+        self._on_finished(information)
+        return [], information
+
+
 _default_opts = {
     "format": "bestvideo[ext=mp4]+bestaudio[ext=m4a]/bestvideo+bestaudio",
     "merge_output_format": "mp4",
@@ -68,18 +130,62 @@ _default_opts = {
 }
 
 
-def _download_youtube(url: str, opts: Optional[Dict[str, Any]] = None):
+def _download_youtube(url: str, opts: Optional[Dict[str, Any]] = None, concurrency: int = 1, downloader=YoutubeDL,
+                      on_finished: Optional[Callable[[Dict[str, Any]], None]] = None, skip: Optional[Set[str]] = None):
     if opts is None:
         opts = _default_opts
     else:
         opts = {**_default_opts, **opts}
-    with YoutubeDL(opts) as ydl:
+    if concurrency > 1:
+        entries = _extract_entries(url, opts, downloader)
+        if entries is not None:
+            _download_entries(entries, opts, concurrency, partial(_create_downloader, downloader, on_finished),
+                              skip if skip is not None else set())
+            return
+    with _create_downloader(downloader, on_finished, opts) as ydl:
         ydl.download([url])
 
 
+def _create_downloader(downloader, on_finished: Optional[Callable[[Dict[str, Any]], None]], opts: Dict[str, Any]):
+    ydl = downloader(opts)
+    if on_finished is not None:
+        # Runs after the merger, when the video, thumbnail and info JSON of the item are all on disk.
+        ydl.add_post_processor(_FinishedPostProcessor(on_finished))
+    return ydl
+
+
+def _extract_entries(url: str, opts: Dict[str, Any], downloader) -> Optional[List[Dict[str, Any]]]:
+    with downloader({**opts, "extract_flat": "in_playlist"}) as ydl:
+        info = ydl.extract_info(url, download=False)
+    if info is None or info.get("_type") != "playlist":
+        return None
+    return [entry for entry in info["entries"] if entry is not None]
+
+
+def _download_entries(entries: List[Dict[str, Any]], opts: Dict[str, Any], concurrency: int, downloader,
+                      skip: Set[str]):
+    items = [(index, entry) for index, entry in enumerate(entries, start=1) if entry.get("id") not in skip]
+    progress = _Progress(len(items))
+    worker_opts = {**opts, "progress_hooks": [progress.hook]}
+    workers = local()
+
+    def download(item: Tuple[int, Dict[str, Any]]):
+        index, entry = item
+        if not hasattr(workers, "ydl"):
+            workers.ydl = downloader(worker_opts)
+        try:
+            # playlist_index is lost when videos are downloaded one by one, so it is passed back into the info.
+            workers.ydl.extract_info(entry.get("url") or entry["id"], ie_key=entry.get("ie_key"),
+                                     extra_info={"playlist_index": index})
+        except Exception as e:
+            print(e)
+        progress.finish()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(download, items))
+
+
 def _download_youtube_playlist(args):
-    if args is None:
-        args = ask_inputs(_arguments)
     try:
         makedirs(args.output)
     except OSError:
@@ -88,29 +194,33 @@ def _download_youtube_playlist(args):
         url = f"https://www.youtube.com/playlist?list={args.yid}"
     else:
         url = f"https://www.youtube.com/watch?v={args.yid}"
-    _download_youtube(url)
-    for file in listdir("."):
-        if isfile(file) and file.endswith(".info.json"):
-            with open(file, "r", encoding="utf-8") as json_file:
-                info = json.loads(json_file.read())
-            if info is not None:
-                vid = info["id"]
-                episode_index = info["playlist_index"] if info["playlist_index"] is not None else 1
-                aired = datetime.strptime(info["upload_date"], "%Y%m%d")
-                file_name = f"{args.prefix} - s{str(args.season).zfill(2)}e{str(episode_index).zfill(2)}"
-                episode = Episode(name=args.prefix,
-                                  season=args.season,
-                                  episode=episode_index,
-                                  title=info["title"],
-                                  aired=aired,
-                                  mpaa=args.mpaa,
-                                  plot=info["description"])
-                XmlSerializer().serialize(episode, output=args.output)
-                exts = [".mp4", ".jpg", ".info.json"]
-                for ext in exts:
-                    try:
-                        old_name = f"{vid}{ext}"
-                        new_name = f"{file_name}{ext}"
-                        rename(old_name, join(args.output, new_name))
-                    except OSError as e:
-                        print(e)
+    journal = _Journal(args.output)
+    opts = {"download_archive": join(args.output, ".youtube_archive.txt")}
+    _download_youtube(url, opts, concurrency=args.concurrency if args.list else 1,
+                      on_finished=partial(_process_info, args=args, journal=journal), skip=journal.completed())
+
+
+def _process_info(info: Dict[str, Any], args, journal: _Journal):
+    vid = info["id"]
+    episode_index = journal.assign(vid, info.get("playlist_index") or 1)
+    aired = datetime.strptime(info["upload_date"], "%Y%m%d")
+    file_name = f"{args.prefix} - s{str(args.season).zfill(2)}e{str(episode_index).zfill(2)}"
+    episode = Episode(name=args.prefix,
+                      season=args.season,
+                      episode=episode_index,
+                      title=info["title"],
+                      aired=aired,
+                      mpaa=args.mpaa,
+                      plot=info["description"])
+    XmlSerializer().serialize(episode, folder=args.output)
+    files = [f"{file_name}.xml"]
+    exts = [".mp4", ".jpg", ".info.json"]
+    for ext in exts:
+        try:
+            old_name = f"{vid}{ext}"
+            new_name = f"{file_name}{ext}"
+            rename(old_name, join(args.output, new_name))
+            files.append(new_name)
+        except OSError as e:
+            print(e)
+    journal.complete(vid, files)